@@ -0,0 +1,187 @@
+#! /usr/bin/env python3
+
+''' Headless entry point: load a project, print statistics, validate it and regenerate its trainer files.
+
+Usage (from src/):  python -m cli PROJECT_PATH --type pokeemerald [--validate] [--export DIR [--splice] [--roundtrip]]
+
+Nothing here imports tkinter, so it runs on CI machines without a display.
+'''
+
+import argparse
+import os
+import sys
+import time
+from modules.ProjectLoader import ProjectLoader, PROJECT_TYPES, PARSER_BACKENDS
+from modules.LoadTrainerData import load_all_parties, parse_trainers, parse_trainer_parties, read_showdown_trainers, read_showdown_names
+from modules.SaveTrainerData import TrainerDataFile, ShowdownPartyFile, save_trainer_files
+from modules.PartyColumns import PartyColumns
+from modules.UsageIndex import UsageIndex, QueryError
+
+
+def trainer_summary(trainer):
+    ''' Everything the trainer files store about a trainer, as a comparable tuple. '''
+    party = tuple((mon.species, mon.level, mon.held_item, mon.moves, mon.iv) for mon in trainer.pokemon)
+    return (trainer.id, trainer.name, trainer.trainer_class, trainer.trainer_pic, trainer.encounter_music,
+            trainer.gender, trainer.double_battle, trainer.items, trainer.ai_flag_mask, party)
+
+
+def validate_project(project_data):
+    ''' Return a list of problems: symbols used by trainers that the constants headers don't define. '''
+    symbols = project_data.symbols
+    problems = []
+    def check(trainer, family, symbol):
+        symbol_family = symbols.family(family)
+        if symbol_family.defined_count and not symbol_family.is_defined(symbol):
+            problems.append(f"{trainer.id}: unknown {family} symbol {symbol}")
+
+    for trainer in project_data.trainers:
+        check(trainer, 'trainer_classes', trainer.trainer_class)
+        check(trainer, 'trainer_pics', trainer.trainer_pic)
+        check(trainer, 'encounter_music', trainer.encounter_music)
+        for item in trainer.items:
+            check(trainer, 'items', item)
+        if len(trainer.pokemon) > 6:
+            problems.append(f"{trainer.id}: party has {len(trainer.pokemon)} Pokémon")
+        for mon in trainer.pokemon:
+            check(trainer, 'species', mon.species)
+            check(trainer, 'items', mon.held_item)
+            for move in mon.moves:
+                check(trainer, 'moves', move)
+    return problems
+
+
+def export_project(project_data, project_type, output_path, splice=False):
+    ''' Regenerate the trainer files of the project into output_path, or with splice copy the source files with
+    only the edited trainers rewritten. Returns the paths whose content changed. '''
+    os.makedirs(output_path, exist_ok=True)
+    paths = {
+        'trainers_party': os.path.join(output_path, 'trainers.party'),
+        'trainer_data': os.path.join(output_path, 'trainers.h'),
+        'trainer_parties': os.path.join(output_path, 'trainer_parties.h'),
+    }
+    if splice:
+        return save_trainer_files(project_data, project_type, paths)
+    if project_data.showdown:
+        names = read_showdown_names(project_data.source_paths['trainers_party'])
+        return ShowdownPartyFile(project_data.trainers, project_data.ai_flags, names).write_file(paths['trainers_party'])
+    save_obj = TrainerDataFile(project_data.trainers, project_type, project_data.ai_flags)
+    save_obj.init_file()
+    return save_obj.write_files(paths['trainer_data'], paths['trainer_parties'])
+
+
+def reload_export(project_data, output_path):
+    ''' Parse the exported files back into trainers with their parties resolved and AI flags resolved like a load. '''
+    if project_data.showdown:
+        trainers = list(read_showdown_trainers(os.path.join(output_path, 'trainers.party')))
+    else:
+        trainers = parse_trainers(os.path.join(output_path, 'trainers.h'))
+        parties = parse_trainer_parties(os.path.join(output_path, 'trainer_parties.h'))
+        for trainer in trainers:
+            trainer.pokemon = parties.get(trainer.party_name, [])
+    for trainer in trainers:
+        project_data.ai_flags.resolve(trainer)
+    return trainers
+
+
+def compare_trainers(original, reloaded):
+    ''' Return a list of differences between two trainer lists. '''
+    differences = []
+    if len(original) != len(reloaded):
+        differences.append(f"trainer count changed: {len(original)} -> {len(reloaded)}")
+    for before, after in zip(original, reloaded):
+        if trainer_summary(before) != trainer_summary(after):
+            differences.append(f"{before.id}: changed after export")
+    return differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli", description="Load, validate and export a decomp project without the GUI.")
+    parser.add_argument("project_path", help="root folder of the decomp project")
+    parser.add_argument("--type", default=PROJECT_TYPES[0], choices=PROJECT_TYPES, help="project type (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and don't update the parse cache")
+    parser.add_argument("--workers", type=int, default=1, help="parser processes, 1 for serial (default: %(default)s)")
+    parser.add_argument("--backend", default="lines", choices=sorted(PARSER_BACKENDS), help="trainer data parser (default: %(default)s)")
+    parser.add_argument("--find", metavar="QUERY", help='list the trainers matching a usage query, e.g. "species:GYARADOS level>40"')
+    parser.add_argument("--party-stats", action="store_true", help="print the party level range of each trainer class")
+    parser.add_argument("--validate", action="store_true", help="report symbols not defined in the constants headers")
+    parser.add_argument("--export", metavar="DIR", help="regenerate the trainer files into DIR")
+    parser.add_argument("--splice", action="store_true", help="with --export, copy the source files rewriting only edited trainers")
+    parser.add_argument("--roundtrip", action="store_true", help="after --export, parse the output back and compare it")
+    args = parser.parse_args(argv)
+
+    if (args.roundtrip or args.splice) and not args.export:
+        parser.error("--roundtrip and --splice need --export")
+
+    timings = []
+    start = time.perf_counter()
+    expansion = args.type == "pokeemerald-expansion" # Also loads the expansion-only constants (natures)
+    loader = ProjectLoader(args.project_path, args.type, expansion, not args.no_cache, args.workers, args.backend)
+    project_data = loader.load()
+    timings.append(('load', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    load_all_parties(project_data.trainers)
+    timings.append(('parties', time.perf_counter() - start))
+
+    party_sizes = [len(trainer.pokemon) for trainer in project_data.trainers]
+    print(f"Project: {args.project_path} ({args.type})")
+    print(f"  trainers: {len(project_data.trainers)}")
+    print(f"  party Pokémon: {sum(party_sizes)}")
+    for family, symbols in project_data.constants.families.items():
+        print(f"  {family}: {len(symbols)}")
+
+    if args.find is not None:
+        start = time.perf_counter()
+        project_data.usages = UsageIndex(project_data)
+        timings.append(('index', time.perf_counter() - start))
+        start = time.perf_counter()
+        try:
+            matches = project_data.usages.query(args.find)
+        except QueryError as e:
+            parser.error(str(e))
+        timings.append(('find', time.perf_counter() - start))
+        for trainer_index in matches:
+            print("  " + project_data.trainers[trainer_index].id)
+        print(f"Find: {len(matches)} trainer(s) match \"{args.find}\"")
+
+    if args.party_stats:
+        start = time.perf_counter()
+        project_data.party_columns = PartyColumns(project_data)
+        distribution = project_data.party_columns.level_distribution()
+        timings.append(('party stats', time.perf_counter() - start))
+        for trainer_class, levels in sorted(distribution.items()):
+            total = sum(levels.values())
+            average = sum(level * count for level, count in levels.items()) / total
+            print(f"  {trainer_class}: {total} Pokémon, levels {min(levels)}-{max(levels)}, average {average:.1f}")
+
+    failed = False
+    if args.validate:
+        start = time.perf_counter()
+        problems = validate_project(project_data)
+        timings.append(('validate', time.perf_counter() - start))
+        for problem in problems:
+            print("  " + problem)
+        print(f"Validation: {len(problems)} problem(s)")
+        failed = failed or bool(problems)
+
+    if args.export:
+        start = time.perf_counter()
+        changed = export_project(project_data, args.type, args.export, args.splice)
+        timings.append(('export', time.perf_counter() - start))
+        print(f"Export: {len(changed)} file(s) changed" + "".join("\n  " + path for path in changed))
+
+        if args.roundtrip:
+            start = time.perf_counter()
+            differences = compare_trainers(project_data.trainers, reload_export(project_data, args.export))
+            timings.append(('roundtrip', time.perf_counter() - start))
+            for difference in differences:
+                print("  " + difference)
+            print(f"Round trip: {len(differences)} difference(s)")
+            failed = failed or bool(differences)
+
+    print("Timings: " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
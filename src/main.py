@@ -2,8 +2,17 @@
 
 import tkinter as tk
 import os
-from modules.classes import Trainer, Pokemon, AiFlagList
+import queue
+import threading
+from modules.classes import Trainer, Pokemon, AiFlagList, ProjectData, DEFAULT_MOVES
 from modules.ProjectSelection import ask_project
+from modules.ProjectLoader import ProjectLoader, LoadCancelled, read_project_files
+from modules.UsageIndex import UsageIndex, QueryError
+from modules.VirtualList import VirtualList
+from modules.SpriteCache import SpriteCache, copy_into
+from modules.GbaGraphics import load_sprite
+from modules.FormView import FormView, RefreshScheduler
+from modules.AutocompleteCombobox import AutocompleteCombobox, SymbolChoices
 from modules.SaveTrainerData import *
 from tkinter import ttk
 from tkinter import filedialog, messagebox
@@ -34,14 +43,34 @@ def set_last_opened_project(path):
     with open(config_path, "w") as f:
         json.dump(config, f, indent=4)
 
+def get_load_workers():
+    ''' Number of processes used to parse a project, from config.json. 1 keeps the serial loader. '''
+    config_path = os.path.join(get_current_directory(), "assets", "config.json")
+    if os.path.exists(config_path):
+        import json
+        with open(config_path, "r") as f:
+            config = json.load(f)
+            return max(1, int(config.get("load_workers", 1)))
+    return 1
+
+def get_sprite_cache_bytes():
+    ''' Memory cap of the decoded sprite cache, from "sprite_cache_mb" in config.json. '''
+    config_path = os.path.join(get_current_directory(), "assets", "config.json")
+    if os.path.exists(config_path):
+        import json
+        with open(config_path, "r") as f:
+            config = json.load(f)
+            return max(1, int(config.get("sprite_cache_mb", 32))) * 1024 * 1024
+    return 32 * 1024 * 1024
+
 TRAINER_PIC_PLACEHOLDER = os.path.join(get_current_directory(), "assets", "trainer_placeholder.png")
 MON_PIC_PLACEHOLDER = os.path.join(get_current_directory(), "assets", "pokemon_placeholder.png")
 
-class ProjectData():
-    def __init__(self):
-        self.trainers = []
-        self.expansion = False
-        self.ai_flags = AiFlagList()
+# How often the main loop checks the background project load for news, in milliseconds.
+LOAD_POLL_MS = 50
+
+# Trainers on each side of the selected one whose pics are read ahead, for scrolling with the arrow keys.
+PREFETCH_NEIGHBOURS = 5
 
 class App(tk.Tk):
     def __init__(self):
@@ -58,11 +87,16 @@ class App(tk.Tk):
         self.showdown_type_output = False
         self.current_trainer_id = 1
         self.current_trainer_mon = 0
+        self.load_queue = None
+        self.load_cancel = None
+        # Decoded trainer and Pokémon pics by file path; pics without a PNG are converted from the built .4bpp.lz.
+        self.sprites = SpriteCache(self, get_sprite_cache_bytes(), load=load_sprite)
         self.resizable(False, False)
 
         self.create_menubar()
         self.create_window_layout()
         self.create_status_bar()
+        self.create_form_views()
 
 
     def create_menubar(self):
@@ -77,6 +111,9 @@ class App(tk.Tk):
         self.file_menu = tk.Menu(self.menubar, tearoff=0)
         file_menu_open = self.file_menu.add_command(label="Open project", command=self.open_project)
         file_menu_save = self.file_menu.add_command(label="Save project", command=self.save_project, state=tk.DISABLED)
+        file_menu_cancel = self.file_menu.add_command(label="Cancel loading", command=self.cancel_project_load, state=tk.DISABLED)
+        self.save_into_project = tk.BooleanVar(value=False)
+        self.file_menu.add_checkbutton(label="Save into project files", variable=self.save_into_project)
         self.file_menu.add_separator()
         file_menu_exit = self.file_menu.add_command(label="Exit", command=self.quit)
 
@@ -116,21 +153,17 @@ class App(tk.Tk):
         col1.pack(side=tk.LEFT, fill=tk.Y)
         col1.pack_propagate(False)
         # Trainer list container set up.
-        listbox_frame = tk.Frame(col1)
-        listbox_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
-        # Internal frame to hold the listbox and the horizontal scrollbar below it
-        listbox_pack_frame = tk.Frame(listbox_frame)
-        listbox_pack_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.listbox_trainers_id = tk.Listbox(listbox_pack_frame, selectmode=tk.SINGLE)
-        self.listbox_trainers_id.bind("<<ListboxSelect>>", self.update_trainer_fields_trigger)
-        scrollbar_x = tk.Scrollbar(listbox_pack_frame, orient=tk.HORIZONTAL, command=self.listbox_trainers_id.xview)
-        self.listbox_trainers_id.config(xscrollcommand=scrollbar_x.set)
-        self.listbox_trainers_id.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        scrollbar_x.pack(side=tk.TOP, fill=tk.X)
-        # Add vertical scrollbar to the right of the listbox
-        scrollbar_y = tk.Scrollbar(listbox_frame, orient=tk.VERTICAL, command=self.listbox_trainers_id.yview)
-        self.listbox_trainers_id.config(yscrollcommand=scrollbar_y.set)
-        scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        # Search and find usages query above the list, e.g. "hiker" or "species:GYARADOS level>40 double".
+        # The list is filtered as you type; Enter also selects the first match.
+        self.trainer_query_var = tk.StringVar()
+        self.trainer_query_entry = ttk.Entry(col1, textvariable=self.trainer_query_var, state="disabled")
+        self.trainer_query_entry.pack(padx=10, pady=(10, 0), fill=tk.X)
+        self.trainer_query_entry.bind("<Return>", self.apply_trainer_query)
+        self.trainer_query_var.trace_add("write", self.filter_trainer_list)
+        # Rows are trainer indexes in project_data.trainers; only the ones in view are in the Tk listbox.
+        self.trainer_list = VirtualList(col1, label=lambda trainer_index: self.project_data.trainers[trainer_index].id)
+        self.trainer_list.bind("<<VirtualListSelect>>", self.update_trainer_fields_trigger)
+        self.trainer_list.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
 
         ############################
         # COLUMN 2 - Trainer Setup #
@@ -249,7 +282,7 @@ class App(tk.Tk):
         # In this case we will define the items as a list of comboboxes.
         self.item_cbs = []
         for i in range(4):
-            cb = ttk.Combobox(items_frame, values=[], state="disabled")
+            cb = AutocompleteCombobox(items_frame, values=[], state="disabled")
             cb.pack(fill=tk.X, pady=2)
             self.item_cbs.append(cb)
 
@@ -309,7 +342,7 @@ class App(tk.Tk):
 
         # Species
         ttk.Label(poke_fields_frame, text="Species:").grid(row=1, column=0, sticky="w", pady=4)
-        self.species_cb = ttk.Combobox(poke_fields_frame, values=[], state="disabled")
+        self.species_cb = AutocompleteCombobox(poke_fields_frame, values=[], state="disabled")
         self.species_cb.grid(row=1, column=1, sticky="ew", pady=4)
         self.species_cb.bind("<<ComboboxSelected>>", self.set_mon_pic_trigger)
 
@@ -320,7 +353,7 @@ class App(tk.Tk):
 
         # Held Item
         ttk.Label(poke_fields_frame, text="Held Item:").grid(row=3, column=0, sticky="w", pady=4)
-        self.held_item_cb = ttk.Combobox(poke_fields_frame, values=[], state="disabled")
+        self.held_item_cb = AutocompleteCombobox(poke_fields_frame, values=[], state="disabled")
         self.held_item_cb.grid(row=3, column=1, sticky="ew", pady=4)
 
         # Ability
@@ -344,7 +377,7 @@ class App(tk.Tk):
         self.default_moves_check.pack(side=tk.LEFT, padx=10)
         self.move_cbs = []
         for i in range(4):
-            cb = ttk.Combobox(poke_fields_frame, values=[], state="disabled", width=16)
+            cb = AutocompleteCombobox(poke_fields_frame, values=[], state="disabled", width=16)
             cb.grid(row=7 + i, column=0, sticky="ew", pady=2, columnspan=2)
             cb.bind('<<ComboboxSelected>>', self.uncheck_default_moves)
             self.move_cbs.append(cb)
@@ -382,6 +415,35 @@ class App(tk.Tk):
         poke_fields_frame.columnconfigure(1, weight=1)
 
 
+    def create_form_views(self):
+        ''' The trainer and Pokémon panels as view-models, so a selection only rewrites the widgets that change.
+        Selection events are coalesced: holding an arrow key refreshes the panels once per idle point. '''
+        self.trainer_form = FormView()
+        self.trainer_form.add_entry('id', self.id_entry, readonly=True)
+        self.trainer_form.add_entry('name', self.name_entry)
+        self.trainer_form.add_variable('gender', self.current_trainer_gender_var)
+        self.trainer_form.add('trainer_pic', self.trainer_pic_cb.get, self.set_trainer_pic)
+        self.trainer_form.add_combobox('trainer_class', self.trainer_class_cb)
+        self.trainer_form.add_combobox('encounter_music', self.encounter_music_cb)
+        self.trainer_form.add_variable('double_battle', self.double_battle_var)
+        self.trainer_form.add_listbox('party', self.party_listbox)
+        for i, item_cb in enumerate(self.item_cbs):
+            self.trainer_form.add_combobox('item%d' % i, item_cb)
+        self.ai_flags_form = FormView() # Filled in populate_ai_flags, the flags depend on the project
+
+        self.mon_form = FormView()
+        self.mon_form.add('species', self.species_cb.get, self.set_species)
+        self.mon_form.add_entry('level', self.level_sb)
+        self.mon_form.add_combobox('held_item', self.held_item_cb)
+        self.mon_form.add_variable('default_moves', self.default_moves_var)
+        for i, move_cb in enumerate(self.move_cbs):
+            self.mon_form.add_combobox('move%d' % i, move_cb)
+        self.mon_form.add_entry('iv', self.ivs_spinboxes['HP'])
+
+        self.trainer_refresh = RefreshScheduler(self, self.refresh_trainer_fields)
+        self.mon_refresh = RefreshScheduler(self, self.refresh_mon_fields)
+
+
     def create_status_bar(self):
         # Status bar at the bottom of the window to show messages to the user.
         self.status = tk.Label(self, text="Project not opened.", bd=1, relief=tk.SUNKEN, anchor=tk.W)
@@ -392,6 +454,7 @@ class App(tk.Tk):
         ''' Open a folder dialog to select the project path and load its data. WIP.'''
         path = filedialog.askdirectory(title="Select project folder", initialdir=get_last_opened_project())
         if path:
+            self.cancel_project_load()
             self.menubar.destroy()
             self.main_frame.destroy()
             self.status.destroy()
@@ -404,28 +467,36 @@ class App(tk.Tk):
                     self.set_project_paths()
                     set_last_opened_project(path)
                     self.project_path = path
-                    self.status.config(text=f"Project opened: {path}")
                     self.check_expansion()
-                    self.enable_trainer_editing()
-                    self.enable_partymon_editing()
                     self.data_adquisition()
                 except:
                     messagebox(message="Could not identify the project type. Try opening another folder.", icon='warning')
 
 
     def save_project(self):
-        save_obj = TrainerDataFile(self.project_data.trainers, self.project_type)
-        save_obj.init_file()
-        save_obj.create_files(os.path.join(get_current_directory(), "assets"))
-    
+        ''' Save into the project's own files when "Save into project files" is checked, else into assets/. '''
+        if self.save_into_project.get():
+            paths = {key: os.path.join(self.project_path, path.lstrip("/")) for key, path in self.project_files.items()}
+        else:
+            assets_path = os.path.join(get_current_directory(), "assets")
+            paths = {
+                'trainers_party': os.path.join(assets_path, 'trainers.party'),
+                'trainer_data': os.path.join(assets_path, 'trainers.h'),
+                'trainer_parties': os.path.join(assets_path, 'trainer_parties.h'),
+            }
+        try:
+            changed = save_trainer_files(self.project_data, self.project_type, paths)
+        except OSError as e:
+            messagebox.showerror(message=f"Could not save the project: {e}")
+            return
+        if changed:
+            self.status.config(text="Saved: " + ", ".join(os.path.basename(path) for path in changed) + " changed.")
+        else:
+            self.status.config(text="Saved: no file changed.")
+
 
     def set_project_paths(self):
-        config_path = os.path.join(get_current_directory(), "assets", "project_files.json")
-        if os.path.exists(config_path):
-            import json
-            with open(config_path, "r") as f:
-                config = json.load(f)
-                self.project_files = config.get(self.project_type, "")
+        self.project_files = read_project_files(self.project_type)
 
 
     def enable_trainer_editing(self):
@@ -452,8 +523,9 @@ class App(tk.Tk):
         for rb in self.radio_gender:
             rb.config(state="normal")
 
+        # Symbol comboboxes are typed into to filter them, the others only pick from their list.
         for cb in trainer_ui_comboboxes:
-            cb.config(state="readonly")
+            cb.config(state="normal" if isinstance(cb, AutocompleteCombobox) else "readonly")
 
         for btn in trainer_ui_buttons:
             btn.config(state=tk.NORMAL)
@@ -490,7 +562,7 @@ class App(tk.Tk):
         self.default_moves_check.config(state="normal")
 
         for cb in partymon_ui_comboboxes:
-            cb.config(state="readonly")
+            cb.config(state="normal" if isinstance(cb, AutocompleteCombobox) else "readonly")
 
         for spinner in partymon_ui_spinners:
             spinner.config(state="normal")
@@ -504,114 +576,168 @@ class App(tk.Tk):
 
 
     def data_adquisition(self):
-        ''' WIP '''
-        # Load all necessary data from the project files to populate the UI elements.
+        ''' Start loading the project files in a background thread. The UI is filled in once the data is ready. '''
+        self.load_queue = queue.Queue()
+        self.load_cancel = threading.Event()
+        loader = ProjectLoader(self.project_path, self.project_type, self.project_data.expansion, workers=get_load_workers())
+        load_thread = threading.Thread(target=self.run_project_load, args=(loader, self.load_queue, self.load_cancel), daemon=True)
+        load_thread.start()
+
+        self.file_menu.entryconfig(2, state=tk.NORMAL)
+        self.bind("<Escape>", lambda event: self.cancel_project_load())
+        self.status.config(text=f"Loading project: {self.project_path}")
+        self.after(LOAD_POLL_MS, self.poll_project_load, self.load_queue)
+
+
+    def run_project_load(self, loader, load_queue, cancel):
+        ''' Background thread body. It never touches widgets, it only reports through the load queue. '''
+        def report_progress(stage, done, total):
+            load_queue.put(('progress', stage, done, total))
+
+        try:
+            project_data = loader.load(report_progress, cancel)
+            load_queue.put(('done', project_data))
+        except LoadCancelled:
+            load_queue.put(('cancelled',))
+        except Exception as e:
+            load_queue.put(('error', e))
+
+
+    def poll_project_load(self, load_queue):
+        ''' Drain the messages sent by the load thread and reschedule itself until the load ends. '''
+        if load_queue is not self.load_queue:
+            return # A newer load replaced this one
+
+        while True:
+            try:
+                message = load_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if message[0] == 'progress':
+                stage, done, total = message[1:]
+                self.status.config(text=f"Loading project: {stage} ({done}/{total})...")
+                continue
+
+            self.end_project_load()
+            if message[0] == 'done':
+                self.finish_project_load(message[1])
+            elif message[0] == 'cancelled':
+                self.status.config(text="Project loading cancelled.")
+            else:
+                self.status.config(text="Project could not be loaded.")
+                messagebox.showerror(message=f"Could not load the project: {message[1]}")
+            return
+
+        self.after(LOAD_POLL_MS, self.poll_project_load, load_queue)
+
+
+    def cancel_project_load(self):
+        ''' Ask the load thread to stop. The current ProjectData is left untouched. '''
+        if self.load_cancel is not None:
+            self.load_cancel.set()
+            self.status.config(text="Cancelling project loading...")
+
+
+    def end_project_load(self):
+        self.load_queue = None
+        self.load_cancel = None
+        self.file_menu.entryconfig(2, state=tk.DISABLED)
+        self.unbind("<Escape>")
+
+
+    def finish_project_load(self, project_data):
+        ''' Fill in the widgets from the loaded data and enable editing. '''
+        self.project_data = project_data
+        self.constants = self.project_data.constants
+        self.showdown_type_output = self.project_data.showdown
+        self.sprites.clear()
+        # The pics shown are from the previous project: make the first selection draw them again.
+        self.trainer_pic_cb.set("")
+        self.species_cb.set("")
         self.populate_trainer_list()
         self.populate_trainer_info()
         self.populate_item_list()
         self.populate_ai_flags()
         self.populate_species_list()
         self.populate_moves_list()
-        self.get_trainer_pic_list()
-        self.get_mon_pic_list()
         # Only if the project is based on pokeemerald expansion
         if self.project_data.expansion:
             self.populate_nature_list()
-        
-        self.get_trainer_data()
-        if self.listbox_trainers_id.size() > 0:
-            self.listbox_trainers_id.select_set(0, 0)
-            self.listbox_trainers_id.event_generate("<<ListboxSelect>>")
-
 
-    def populate_trainer_list(self):
-        ''' Populate the trainer ID listbox from constants/opponents.h file. '''
-        trainer_id_list = []
+        self.enable_trainer_editing()
+        self.enable_partymon_editing()
+        self.status.config(text=f"Project opened: {self.project_path}")
 
-        with open(os.path.join(self.project_path, self.project_files["opponents"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        for line in full_content:
-            if line.startswith("#define TRAINER_"):
-                trainer_name = line.split()[1]
-                trainer_id_list.append(trainer_name)
+        if self.trainer_list.size() > 0:
+            self.trainer_list.select(self.trainer_list.key_at(0), notify=True)
 
-        trainer_id_list = trainer_id_list[1:] # Remove TRAINER_NONE
 
-        for trainer_name in trainer_id_list:
-            self.listbox_trainers_id.insert(tk.END, trainer_name)
+    def populate_trainer_list(self):
+        ''' Populate the trainer list with every trainer of the project. '''
+        self.trainer_query_entry.config(state="normal")
+        self.trainer_query_var.set("")
+        self.trainer_list.set_model(range(1, len(self.project_data.trainers))) # Skip TRAINER_NONE
+
+
+    def filter_trainer_list(self, *args):
+        ''' Filter the trainer list with the query typed above it. The current trainer stays selected if it still matches. '''
+        query = self.trainer_query_var.get()
+        if not query.strip():
+            self.trainer_list.set_model(range(1, len(self.project_data.trainers)))
+            return
+        # Built by the first query rather than at load, so opening a project keeps the parties lazy.
+        if self.project_data.usages is None:
+            self.project_data.usages = UsageIndex(self.project_data)
+        try:
+            matches = self.project_data.usages.query(query)
+        except QueryError as e:
+            self.status.config(text=str(e))
+            return
+        self.trainer_list.set_model(index for index in matches if index > 0)
+        self.status.config(text=f"{self.trainer_list.size()} trainer(s) match \"{query.strip()}\".")
+
+
+    def apply_trainer_query(self, event=None):
+        ''' Enter in the query entry: filter and, if the current trainer was filtered out, select the first match. '''
+        self.filter_trainer_list()
+        if self.trainer_list.size() > 0 and self.trainer_list.selected() is None:
+            self.trainer_list.select(self.trainer_list.key_at(0), notify=True)
     
 
     def populate_trainer_info(self):
         ''' Populate the trainer info comboboxes from constants/trainers.h file. '''
-        trainer_pic_id_list = []
-        trainer_class_id_list = []
-        encounter_music_id_list = []
-
-        with open(os.path.join(self.project_path, self.project_files["trainer_info"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        for line in full_content:
-            if line.startswith("#define TRAINER_PIC_"):
-                trainer_pic_id = line.split()[1]
-                trainer_pic_id_list.append(trainer_pic_id)
-            elif line.startswith("#define TRAINER_CLASS_"):
-                trainer_class_id = line.split()[1]
-                trainer_class_id_list.append(trainer_class_id)
-            elif line.startswith("#define TRAINER_ENCOUNTER_MUSIC_"):
-                trainer_encounter_music_id = line.split()[1]
-                encounter_music_id_list.append(trainer_encounter_music_id)
-        
-        self.trainer_pic_cb['values'] = trainer_pic_id_list
-        self.trainer_class_cb['values'] = trainer_class_id_list
-        self.encounter_music_cb['values'] = encounter_music_id_list
+        self.trainer_pic_cb['values'] = self.constants.get('trainer_pics')
+        self.trainer_class_cb['values'] = self.constants.get('trainer_classes')
+        self.encounter_music_cb['values'] = self.constants.get('encounter_music')
 
 
     def populate_item_list(self):
         ''' Populate the item comboboxes from constants/items.h file.'''
-        item_id_list = []
-
-        with open(os.path.join(self.project_path, self.project_files["items"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-
-        for line in full_content:
-            if line.startswith("#define ITEM_"):
-                item_id = line.split()[1]
-                item_id_list.append(item_id)
-            
-        for line in full_content:
-            if line.startswith("#define ITEMS_COUNT"):
-                item_count = int(line.split()[2])
-                item_id_list = item_id_list[:item_count]
-        
-        for cb in self.item_cbs:
-            cb['values'] = item_id_list
+        item_id_list = self.constants.get('items')
+        items = SymbolChoices('items', item_id_list)
+
+        for cb in self.item_cbs + [self.held_item_cb]:
+            cb.set_choices(items)
             if item_id_list:
                 cb.set(item_id_list[0])
-        
-        self.held_item_cb['values'] = item_id_list
-        if item_id_list:
-            self.held_item_cb.set(item_id_list[0])
 
 
     def populate_ai_flags(self):
         ''' Populate the AI flags from constants/battle_ai.h file. '''
-        with open(os.path.join(self.project_path, self.project_files["battle_ai"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        ai_flag = None
-
-        for line in full_content:
-            if line.startswith("#define AI_SCRIPT_"):
-                ai_flag = line.split()[1]
-                self.project_data.ai_flags.add_flag(ai_flag)
-                ai_flag = None
-        
+        # Masks are relative to the project's AiFlagList, so drop the checkboxes of a previously opened project.
+        for widget in self.ai_tab.grid_slaves():
+            if isinstance(widget, ttk.Checkbutton):
+                widget.destroy()
+        self.ai_flag_vars = []
+        self.ai_flags_form = FormView()
         for i, flag in enumerate(self.project_data.ai_flags.flags):
             var = tk.BooleanVar()
-            checkbox = ttk.Checkbutton(self.ai_tab, text=flag[10:], variable=var)
+            checkbox = ttk.Checkbutton(self.ai_tab, text=flag.split('_', 2)[2], variable=var)
             checkbox.grid(row=1 + i//2, column=i%2, sticky="w", padx=2, pady=1)
-            self.ai_flag_vars.append((flag, var))
+            flag_mask = self.project_data.ai_flags.flag_mask(flag)
+            self.ai_flag_vars.append((flag_mask, var))
+            self.ai_flags_form.add_variable(flag_mask, var)
         
         if self.project_data.expansion:
             self.preset_cb.config(state="readonly")
@@ -620,282 +746,66 @@ class App(tk.Tk):
 
     def populate_species_list(self):
         ''' Populate the trainer info comboboxes from constants/species.h file. '''
-        species_id_list = []
-
-        with open(os.path.join(self.project_path, self.project_files["species"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        for line in full_content:
-            if line.startswith("#define SPECIES_"):
-                species_id = line.split()[1]
-                species_id_list.append(species_id)
-        
-        self.species_cb['values'] = species_id_list[1:] # Remove SPECIES_NONE
+        self.species_cb.set_choices(SymbolChoices('species', self.constants.get('species')[1:])) # Remove SPECIES_NONE
     
 
     def populate_moves_list(self):
         ''' Populate the trainer info comboboxes from constants/moves.h file. '''
-        move_id_list = []
+        moves = SymbolChoices('moves', self.constants.get('moves'))
 
-        with open(os.path.join(self.project_path, self.project_files["moves"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        for line in full_content:
-            if line.startswith("#define MOVE_"):
-                move_id = line.split()[1]
-                move_id_list.append(move_id)
-        
-        for line in full_content:
-            if line.startswith("#define MOVES_COUNT"):
-                moves_count = int(line.split()[2])
-                move_id_list = move_id_list[:moves_count]
-        
         for cb in self.move_cbs:
-            cb['values'] = move_id_list
+            cb.set_choices(moves)
 
 
     def populate_nature_list(self):
         ''' Populate the trainer info comboboxes from constants/pokemon.h file. '''
-        natures_id_list = []
+        self.nature_cb['values'] = self.constants.get('natures')
 
-        with open(os.path.join(self.project_path, self.project_files["natures"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        for line in full_content:
-            if line.startswith("#define NATURE_"):
-                nature_id = line.split()[1]
-                natures_id_list.append(nature_id)
-        
-        self.nature_cb['values'] = natures_id_list
 
-
-    def get_trainer_pic_list(self):
-        self.trainer_pics = []
-        with open(os.path.join(self.project_path, self.project_files["trainer_pics_ptr"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-    
-        for line in full_content:
-            if line.strip().startswith('TRAINER_SPRITE'):
-                data = line.strip()[15:-2]
-                entry = data.split(', ')
-                new_pic = {'id': 'TRAINER_PIC_' + entry[0], 'pointer': entry[1], 'path': ''}
-                self.trainer_pics.append(new_pic)
-
-        with open(os.path.join(self.project_path, self.project_files["trainer_pics_dir"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        for line in full_content:
-            if line.strip().startswith('const u32 gTrainerFrontPic_'):
-                dir_info = line.strip()[10:-3].replace('[]', '').replace('INCBIN_U32("', '').replace('.4bpp.lz', '.png').split(' = ')
-                for pic in self.trainer_pics:
-                    if pic['pointer'] == dir_info[0]:
-                        pic['path'] = dir_info[1]
-    
-
-    def get_mon_pic_list(self):
-        self.mon_pics = []
-        with open(os.path.join(self.project_path, self.project_files["mon_pics_ptr"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-    
-        for line in full_content:
-            if line.strip().startswith('SPECIES_SPRITE('):
-                data = line.strip()[15:-2].replace(' ', '')
-                entry = data.split(',')
-                new_pic = {'species': 'SPECIES_' + entry[0], 'pointer': entry[1], 'path': ''}
-                self.mon_pics.append(new_pic)
-
-        with open(os.path.join(self.project_path, self.project_files["mon_pics_dir"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        for line in full_content:
-            if line.strip().startswith('const u32 gMonFrontPic_'):
-                dir_info = line.strip()[10:-3].replace('[]', '').replace('INCBIN_U32("', '').replace('.4bpp.lz', '.png').split(' = ')
-                for pic in self.mon_pics:
-                    if pic['pointer'] == dir_info[0]:
-                        if pic['species'] in ['SPECIES_CASTFORM']:
-                            pic['path'] = ''
-                            path_list = dir_info[1].split('/')
-                            path_list.insert(-1, 'normal')
-                            for item in path_list:
-                                if item == path_list[0]:
-                                    pic['path'] += item
-                                else:
-                                    pic['path'] += '/' + item
-                        else:
-                            pic['path'] = dir_info[1]
-
-
-    def get_trainer_data(self):
-        ''' Get the trainer info from data/trainers.h file and process it to self.project_data. '''
-
-        with open(os.path.join(self.project_path, self.project_files["trainer_data"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-        
-        # .partyFlags - It will be adquired from party macros
-        # .trainerClass
-        # .encounterMusic_gender
-        # .trainerPic
-        # .trainerName
-        # .items
-        # .doubleBattle
-        # .aiFlags
-        # .partySize - It will be adquired from party macros
-        # .party
-
-        new_trainer = None
-        for line in full_content:
-            data = line.strip().split(" ")
-            field = data[0]
-            if field[:9] == '[TRAINER_':
-                new_trainer = Trainer(line.strip().split(" ")[0][1:-1])
-                uses_party_macro = True
-            elif field == '.trainerClass':
-                new_trainer.trainer_class = data[2].strip('",')
-            elif field == '.encounterMusic_gender':
-                new_trainer.gender = self.gender_options[0]
-                for stuff in data[2:]:
-                    if stuff.startswith("TRAINER_ENCOUNTER_MUSIC_"):
-                        new_trainer.encounter_music = stuff.strip('",')
-                    elif stuff == "F_TRAINER_FEMALE":
-                        new_trainer.gender = self.gender_options[1]
-            elif field == '.trainerPic':
-                new_trainer.trainer_pic = data[2].strip('",')
-            elif field == '.trainerName':
-                new_trainer.name = line.split('"')[1]
-            elif field == '.items':
-                for item in data[2:]:
-                    if item.strip('",{}') != '':
-                        new_trainer.items.append(item.strip('",{}'))
-                while len(new_trainer.items) < 4:
-                    new_trainer.items.append('ITEM_NONE')
-            elif field == '.doubleBattle':
-                if data[2] == 'TRUE,':
-                    new_trainer.double_battle = True
-                else:
-                    new_trainer.double_battle = False
-            elif field == '.aiFlags':
-                for flag in data[2:]:
-                    if self.project_data.ai_flags.is_flag(flag.strip('",{}')):
-                        new_trainer.ai_flags.append(flag.strip('",'))
-            elif field == '.partyFlags':
-                uses_party_macro = False
-            elif field == '.partySize':
-                uses_party_macro = False
-            elif field == '.party':
-                if uses_party_macro:
-                    party_pointer = data[2].split('(')[1].strip('),')
-                    new_trainer.party_name = party_pointer
-                    new_trainer.pokemon = self.get_partymon_data(party_pointer)
-            elif field == '},':
-                self.project_data.trainers.append(new_trainer)
-                new_trainer = None
-
-
-    def get_partymon_data(self, pointer):
-        ''' Get the party Pokémon data from data/trainer_parties.h file and process it to return as a Pokémon list. '''
-
-        with open(os.path.join(self.project_path, self.project_files["trainer_parties"].lstrip("/")), "r") as f:
-            full_content = f.readlines()
-
-        party = []
-        new_mon = None
-        
-        party_pointer_found = False
-        for line in full_content:
-            data = line.strip().split(" ")
-            field = data[0]
-            if line.strip().startswith('static const struct') and (pointer + '[]') in line.split(" "):
-                party_pointer_found = True
-            if party_pointer_found:
-                if field == '}' or field == '},':
-                    new_mon = Pokemon(mon_struct['species'])
-                    new_mon.level = int(mon_struct['lvl'])
-                    new_mon.held_item = mon_struct['heldItem']
-                    new_mon.iv = int(mon_struct['iv'])
-                    new_mon.moves = mon_struct['moves']
-                    party.append(new_mon)
-                    new_mon = None
-                    mon_struct = None
-                if field == '{':
-                    mon_struct = {
-                        'iv': '', # Somehow up to 255
-                        'lvl': '',
-                        'species': '',
-                        'heldItem': 'ITEM_NONE',
-                        'moves': ['MOVE_NONE', 'MOVE_NONE', 'MOVE_NONE', 'MOVE_NONE']
-                    }
-                if field == '.iv':
-                    mon_struct['iv'] = int(data[2].strip(','))
-                if field == '.lvl':
-                    mon_struct['lvl'] = int(data[2].strip(','))
-                if field == '.species':
-                    mon_struct['species'] = data[2].strip('",')
-                if field == '.heldItem':
-                    mon_struct['heldItem'] = data[2].strip('",')
-                if field == '.moves':
-                    moves = []
-                    for move in data[2:]:
-                        if move.strip('",{}') != '':
-                            moves.append(move.strip('",{}'))
-                    while len(moves) < 4:
-                        moves.append('MOVE_NONE')
-                    mon_struct['moves'] = moves
-                if line.strip().startswith('};'):
-                    party_pointer_found = False
-    
-        return party
+    def update_trainer_fields_trigger(self, event):
+        ''' Refresh the trainer fields once the burst of selection events this one belongs to is over. '''
+        self.trainer_refresh.request()
 
 
-    def update_trainer_fields_trigger(self, event):
-        ''' Update the trainer fields in the UI with the data from self.current_trainer.'''
-        selected_idx = self.listbox_trainers_id.curselection()
-        if selected_idx:
-            self.current_trainer_id = self.get_trainer_from_selected_id(selected_idx[0] + 1) # +1 to skip TRAINER_NONE
+    def refresh_trainer_fields(self):
+        trainer_id = self.trainer_list.selected()
+        if trainer_id is not None:
+            self.current_trainer_id = trainer_id
             self.update_trainer_fields(self.current_trainer_id)
             if self.party_listbox.size() > 0:
+                self.party_listbox.selection_clear(0, tk.END)
                 self.party_listbox.select_set(0, 0)
-                self.party_listbox.event_generate("<<ListboxSelect>>")
+                self.current_trainer_mon = 0
+                self.update_mon_fields(self.current_trainer_mon)
+            self.prefetch_sprites(trainer_id)
 
 
-    def update_trainer_fields(self, trainer_id):
-        # Insert the ID
-        self.id_entry.config(state="normal")
-        self.id_entry.delete(0, tk.END)
-        self.id_entry.insert(0, self.project_data.trainers[trainer_id].id)
-        self.id_entry.config(state="readonly")
-        # Insert the name
-        self.name_entry.delete(0, tk.END)
-        self.name_entry.insert(0, self.project_data.trainers[trainer_id].name)
-        # Set the gender
-        self.current_trainer_gender_var.set(self.project_data.trainers[trainer_id].gender)
-        for i, opt in enumerate(self.gender_options):
-            self.radio_gender[i].config(variable=self.current_trainer_gender_var, value=opt)
-        # Set the trainer pic
-        self.set_trainer_pic(self.project_data.trainers[trainer_id].trainer_pic)
-        # Set the trainer class
-        self.trainer_class_cb.set(self.project_data.trainers[trainer_id].trainer_class)
-        # Set the encounter music
-        self.encounter_music_cb.set(self.project_data.trainers[trainer_id].encounter_music)
-        # Set the double battle checkbox
-        self.double_battle_var.set(self.project_data.trainers[trainer_id].double_battle)
-        # Set the party list
-        self.update_party_list(trainer_id)
-
-        # Set the items
-        for i in range(4):
-            if i < len(self.project_data.trainers[trainer_id].items):
-                self.item_cbs[i].set(self.project_data.trainers[trainer_id].items[i])
-        
-        # Set the AI flags
-        for flag, var in self.ai_flag_vars:
-            flag_exists = False
-            for trainer_flag in self.project_data.trainers[trainer_id].ai_flags:
-                if flag == trainer_flag:
-                    flag_exists = True
-                else:
-                    flag_exists = flag_exists or False
+    def prefetch_sprites(self, trainer_id):
+        ''' Read ahead the pics of the trainers around the selected one and of the species of its party. '''
+        trainers = self.project_data.trainers
+        neighbours = self.trainer_list.neighbours(trainer_id, PREFETCH_NEIGHBOURS)
+        paths = [self.get_trainer_pic_file(trainers[index].trainer_pic) for index in neighbours]
+        paths += [self.get_mon_pic_file(mon.species) for mon in trainers[trainer_id].pokemon]
+        # The prefetcher reads the newest requests first, so the nearest neighbours go last.
+        self.sprites.prefetch(reversed(paths))
 
-            var.set(flag_exists)
+
+    def update_trainer_fields(self, trainer_id):
+        trainer = self.project_data.trainers[trainer_id]
+        values = {
+            'id': trainer.id,
+            'name': trainer.name,
+            'gender': trainer.gender,
+            'trainer_pic': trainer.trainer_pic,
+            'trainer_class': trainer.trainer_class,
+            'encounter_music': trainer.encounter_music,
+            'double_battle': trainer.double_battle,
+            'party': tuple(mon.species for mon in trainer.pokemon),
+        }
+        # Slots past the trainer's items keep whatever they showed, as before.
+        values.update(('item%d' % i, item) for i, item in enumerate(trainer.items[:4]))
+        self.trainer_form.show(values)
+        self.ai_flags_form.show({flag_mask: bool(trainer.ai_flag_mask & flag_mask) for flag_mask, var in self.ai_flag_vars})
 
 
     def update_party_list(self, trainer_id):
@@ -905,6 +815,10 @@ class App(tk.Tk):
 
 
     def update_mon_fields_trigger(self, event):
+        self.mon_refresh.request()
+
+
+    def refresh_mon_fields(self):
         selected_idx = self.party_listbox.curselection()
         if selected_idx:
             self.current_trainer_mon = self.get_mon_from_selected_id(selected_idx[0])
@@ -912,40 +826,17 @@ class App(tk.Tk):
 
 
     def update_mon_fields(self, mon_id):
-        # Set the mon species
-        self.species_cb.set(self.project_data.trainers[self.current_trainer_id].pokemon[mon_id].species)
-        # Set the mon pic
-        self.set_mon_pic(self.project_data.trainers[self.current_trainer_id].pokemon[mon_id].species)
-        # Set the level
-        self.level_sb.delete(0, tk.END)
-        self.level_sb.insert(0, self.project_data.trainers[self.current_trainer_id].pokemon[mon_id].level)
-        # Set the held item
-        self.held_item_cb.set(self.project_data.trainers[self.current_trainer_id].pokemon[mon_id].held_item)
-        # Set the moves
-        if self.project_data.trainers[self.current_trainer_id].pokemon[mon_id].moves == ['MOVE_NONE', 'MOVE_NONE', 'MOVE_NONE', 'MOVE_NONE']:
-            self.default_moves_var.set(True)
-        else:
-            self.default_moves_var.set(False)
-        
-        for i in range(4):
-            self.move_cbs[i].set(self.project_data.trainers[self.current_trainer_id].pokemon[mon_id].moves[i])
-        # Set the IVs
-        self.ivs_spinboxes['HP'].delete(0, tk.END)
-        self.ivs_spinboxes['HP'].insert(0, self.project_data.trainers[self.current_trainer_id].pokemon[mon_id].iv)
-
-
-    def get_trainer_from_selected_id(self, id):
-        '''This function does innecessary operations to get the same ID it's provided, just because using the selected index
-           will make the program crazy. TkInter uses the same focus for both listboxes, so somehow they collide and gets
-           changed in runtime. We better use this functions to get a constant integer as ID.'''
-        index = 0
-        trainer_id = self.project_data.trainers[id].id
-        for trainer in self.project_data.trainers:
-            if trainer_id == trainer.id:
-                return index
-            else:
-                index += 1
-    
+        mon = self.project_data.trainers[self.current_trainer_id].pokemon[mon_id]
+        values = {
+            'species': mon.species,
+            'level': str(mon.level),
+            'held_item': mon.held_item,
+            'default_moves': mon.moves == DEFAULT_MOVES,
+            'iv': str(mon.iv),
+        }
+        values.update(('move%d' % i, move) for i, move in enumerate(mon.moves[:4]))
+        self.mon_form.show(values)
+
 
     def get_mon_from_selected_id(self, id):
         for i in range(6):
@@ -961,17 +852,27 @@ class App(tk.Tk):
     def set_trainer_pic(self, trainer_pic_id):
         self.trainer_pic_cb.set(trainer_pic_id)
         try:
-            pic_dir = os.path.join(self.project_path, self.get_trainer_pic_path_from_id(trainer_pic_id))
-            img_path = pic_dir if os.path.exists(pic_dir) else TRAINER_PIC_PLACEHOLDER
-            self.trainer_img.config(file=img_path)
+            image = self.sprites.get(self.get_trainer_pic_file(trainer_pic_id))
+            if image is None:
+                image = self.sprites.get(TRAINER_PIC_PLACEHOLDER)
+            copy_into(self.trainer_img, image)
         except Exception:
             pass
 
 
     def get_trainer_pic_path_from_id(self, id):
-        for pic in self.trainer_pics:
-            if pic['id'] == id:
-                return pic['path']
+        return self.project_data.trainer_pics.get_path(id)
+
+
+    def get_trainer_pic_file(self, trainer_pic_id):
+        ''' Absolute path of a trainer pic, None if the pic ID is unknown. '''
+        path = self.get_trainer_pic_path_from_id(trainer_pic_id)
+        return os.path.join(self.project_path, path) if path else None
+
+
+    def set_species(self, mon_species):
+        self.species_cb.set(mon_species)
+        self.set_mon_pic(mon_species)
 
 
     def set_mon_pic_trigger(self, event):
@@ -981,12 +882,11 @@ class App(tk.Tk):
 
     def set_mon_pic(self, mon_species):
         try:
-            pic_dir = os.path.join(self.project_path, self.get_mon_pic_path_from_species(mon_species))
-            if os.path.exists(pic_dir):
-                img_path = pic_dir
-            else:
-                img_path = MON_PIC_PLACEHOLDER
-            self.mon_img.config(file=img_path, height=64, width=64)
+            image = self.sprites.get(self.get_mon_pic_file(mon_species))
+            if image is None:
+                image = self.sprites.get(MON_PIC_PLACEHOLDER)
+            # Front pics can hold several frames below each other; show the first one.
+            copy_into(self.mon_img, image, 64, 64)
         except Exception:
             pass
 
@@ -1008,18 +908,35 @@ class App(tk.Tk):
 
 
     def get_mon_pic_path_from_species(self, species):
-        for pic in self.mon_pics:
-            if pic['species'] == species:
-                return pic['path']
+        return self.project_data.mon_pics.get_path(species)
+
+
+    def get_mon_pic_file(self, species):
+        ''' Absolute path of the front pic of a species, None if the species has none. '''
+        path = self.get_mon_pic_path_from_species(species)
+        return os.path.join(self.project_path, path) if path else None
+
+
+    def check_symbol_fields(self, comboboxes):
+        ''' Complete the text typed in autocomplete comboboxes. Shows an error and returns False if one of them
+        still holds something that isn't a constant of its family. '''
+        for cb in comboboxes:
+            cb.complete()
+            if cb.get() not in cb.choices.members:
+                messagebox.showerror(message=f"\"{cb.get()}\" is not one of the project's {cb.choices.name}. Nothing was saved.")
+                cb.focus_set()
+                return False
+        return True
 
 
     def save_mon_data(self):
+        if not self.check_symbol_fields([self.species_cb, self.held_item_cb] + self.move_cbs):
+            return
         mon = self.project_data.trainers[self.current_trainer_id].pokemon[self.current_trainer_mon]
         mon.species = self.species_cb.get()
         mon.level = int(self.level_sb.get())
         mon.held_item = self.held_item_cb.get()
-        for move_index in range(0,4):
-            mon.moves[move_index] = self.move_cbs[move_index].get()
+        mon.moves = [self.move_cbs[move_index].get() for move_index in range(0,4)]
 
         if self.check_expansion():
             mon.ivs = None
@@ -1030,6 +947,7 @@ class App(tk.Tk):
             mon.iv = int(self.ivs_spinboxes['HP'].get())
 
         self.update_party_list(self.current_trainer_id)
+        self.trainer_changed(self.current_trainer_id)
 
 
     def add_party_mon(self):
@@ -1037,12 +955,14 @@ class App(tk.Tk):
             new_mon = Pokemon("SPECIES_BULBASAUR")
             self.project_data.trainers[self.current_trainer_id].pokemon.append(new_mon)
             self.update_party_list(self.current_trainer_id)
+            self.trainer_changed(self.current_trainer_id)
 
     
     def del_party_mon(self):
         if len(self.project_data.trainers[self.current_trainer_id].pokemon) > 1:
             self.project_data.trainers[self.current_trainer_id].pokemon.remove(self.project_data.trainers[self.current_trainer_id].pokemon[self.current_trainer_mon])
             self.update_party_list(self.current_trainer_id)
+            self.trainer_changed(self.current_trainer_id)
             self.party_listbox.selection_set(0, 0)
             self.party_listbox.event_generate("<<ListboxSelect>>")
     
@@ -1055,6 +975,7 @@ class App(tk.Tk):
                 self.project_data.trainers[self.current_trainer_id].pokemon.remove(self.project_data.trainers[self.current_trainer_id].pokemon[self.current_trainer_mon])
                 self.project_data.trainers[self.current_trainer_id].pokemon.insert(self.current_trainer_mon - 1, mon)
                 self.update_party_list(self.current_trainer_id)
+                self.trainer_changed(self.current_trainer_id)
                 self.party_listbox.selection_set(self.current_trainer_mon - 1, self.current_trainer_mon - 1)
                 self.party_listbox.event_generate("<<ListboxSelect>>")
 
@@ -1067,6 +988,7 @@ class App(tk.Tk):
                 self.project_data.trainers[self.current_trainer_id].pokemon.remove(self.project_data.trainers[self.current_trainer_id].pokemon[self.current_trainer_mon])
                 self.project_data.trainers[self.current_trainer_id].pokemon.insert(self.current_trainer_mon + 1, mon)
                 self.update_party_list(self.current_trainer_id)
+                self.trainer_changed(self.current_trainer_id)
                 if self.current_trainer_mon + 1 < len(self.project_data.trainers[self.current_trainer_id].pokemon):
                     self.party_listbox.selection_set(self.current_trainer_mon + 1, self.current_trainer_mon + 1)
                 else:
@@ -1075,6 +997,8 @@ class App(tk.Tk):
 
 
     def save_trainer_data(self):
+        if not self.check_symbol_fields(self.item_cbs):
+            return
         trainer = self.project_data.trainers[self.current_trainer_id]
         trainer.name = self.name_entry.get()
         trainer.trainer_class = self.trainer_class_cb.get()
@@ -1088,15 +1012,24 @@ class App(tk.Tk):
             trainer_items.append(item.get())
         trainer.items = trainer_items
 
-        trainer_ai_flags = []
+        ai_flag_mask = 0
+        for flag_mask, var in self.ai_flag_vars:
+            if var.get() == True:
+                ai_flag_mask |= flag_mask
 
-        for flag in self.ai_flag_vars:
-            if flag[1].get() == True:
-                trainer_ai_flags.append(flag[0])
-
-        trainer.ai_flags = trainer_ai_flags
+        trainer.ai_flag_mask = ai_flag_mask
         # trainer.party_name =
         trainer.maps = []
+        self.trainer_changed(self.current_trainer_id)
+
+
+    def trainer_changed(self, trainer_id):
+        ''' Mark the trainer for the next save and keep the project-wide party columns and usage indexes in sync. '''
+        self.project_data.trainers[trainer_id].dirty = True
+        if self.project_data.party_columns is not None:
+            self.project_data.party_columns.update_trainer(trainer_id)
+        if self.project_data.usages is not None:
+            self.project_data.usages.update_trainer(trainer_id)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+#! /usr/bin/env python3
+
+import os
+import tkinter as tk
+from tkinter import ttk
+
+# Suggestions shown while typing; the popdown stays short enough to scan.
+MAX_SUGGESTIONS = 40
+
+# Keys that move around the combobox instead of changing its text.
+NAVIGATION_KEYS = {'Up', 'Down', 'Left', 'Right', 'Home', 'End', 'Prior', 'Next', 'Return', 'KP_Enter', 'Escape',
+                   'Tab', 'ISO_Left_Tab', 'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R'}
+
+
+class SymbolChoices:
+    ''' The names of one constant family (species, moves, items) offered by comboboxes, and the matching of typed
+    text against them. SymbolTable.SymbolFamily is the ID registry of a family; this only holds its choices.
+
+    The list is converted to Tcl once, into the array ::symbol_values, and comboboxes point their -values at it
+    from Tcl, so none of them converts the Python list again. Matching is case insensitive and ignores the
+    common prefix, so "pika" finds SPECIES_PIKACHU.
+    '''
+
+    def __init__(self, name, symbols):
+        self.name = name
+        self.symbols = tuple(symbols or ())
+        self.members = set(self.symbols)
+        common = os.path.commonprefix(self.symbols) if len(self.symbols) > 1 else ''
+        self.prefix = common[:common.rfind('_') + 1]
+        self.keys = [symbol[len(self.prefix):].lower() for symbol in self.symbols]
+        self.interpreters = set() # Tcl interpreters the list was sent to
+
+    def tcl_variable(self, widget):
+        ''' Name of the Tcl variable holding the list, converting it on the first use by an interpreter. '''
+        variable = '::symbol_values(%s)' % self.name
+        if id(widget.tk) not in self.interpreters:
+            widget.tk.call('set', variable, self.symbols)
+            self.interpreters.add(id(widget.tk))
+        return variable
+
+    def matches(self, text, candidates=None):
+        ''' Indexes of the symbols containing `text`, among `candidates` (indexes, in order) if given. '''
+        text = self.normalize(text)
+        if candidates is None:
+            candidates = range(len(self.symbols))
+        keys = self.keys
+        return [index for index in candidates if text in keys[index]]
+
+    def rank(self, text, candidates, limit=MAX_SUGGESTIONS):
+        ''' The best `limit` symbols among matching candidates: prefix matches, then matches at the start of a
+        word, then the rest, each group in the original order. '''
+        text = self.normalize(text)
+        groups = ([], [], [])
+        for index in candidates:
+            key = self.keys[index]
+            if key.startswith(text):
+                groups[0].append(index)
+            elif '_' + text in key:
+                groups[1].append(index)
+            else:
+                groups[2].append(index)
+            if len(groups[0]) >= limit:
+                break # Nothing can outrank these
+        ranked = (groups[0] + groups[1] + groups[2])[:limit]
+        return [self.symbols[index] for index in ranked]
+
+    def normalize(self, text):
+        text = text.strip().lower()
+        prefix = self.prefix.lower()
+        return text[len(prefix):] if prefix and text.startswith(prefix) else text
+
+
+class AutocompleteCombobox(ttk.Combobox):
+    ''' A combobox over SymbolChoices that narrows its popdown to the symbols matching what is typed.
+
+    Each keystroke that extends the text filters the previous matches instead of the whole family. Return takes
+    the best match, and leaving the field with text that is not a symbol completes it the same way, or puts back
+    the value it had. Enable it with state "normal": "readonly" would not let the user type.
+    '''
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.choices = SymbolChoices('', ())
+        self.typed = None       # Text the candidates were computed for, None while showing the whole family
+        self.candidates = None
+        self.focus_value = ''
+        # Own bind tag, so bindings the application adds to the widget don't replace these.
+        self.bindtags((str(self), 'AutocompleteCombobox') + self.bindtags()[1:])
+        self.bind_class('AutocompleteCombobox', '<KeyRelease>', lambda event: event.widget.on_key_release(event))
+        self.bind_class('AutocompleteCombobox', '<Return>', lambda event: event.widget.complete())
+        self.bind_class('AutocompleteCombobox', '<KP_Enter>', lambda event: event.widget.complete())
+        self.bind_class('AutocompleteCombobox', '<FocusIn>', lambda event: event.widget.on_focus_in())
+        self.bind_class('AutocompleteCombobox', '<FocusOut>', lambda event: event.widget.on_focus_out())
+        self.bind_class('AutocompleteCombobox', '<<ComboboxSelected>>', lambda event: event.widget.show_all())
+
+    def set_choices(self, choices):
+        self.choices = choices
+        self.show_all()
+
+    def show_all(self):
+        ''' Offer the whole family again, straight from the shared Tcl list. '''
+        self.typed = None
+        self.candidates = None
+        self.tk.eval('%s configure -values $%s' % (self, self.choices.tcl_variable(self)))
+
+    def filter(self, text):
+        ''' Narrow the popdown to the best matches of `text`. Returns them. '''
+        # Whatever contains the new text contains the old one, so a longer search only narrows the last matches.
+        if self.typed is not None and self.choices.normalize(self.typed) in self.choices.normalize(text):
+            self.candidates = self.choices.matches(text, self.candidates)
+        else:
+            self.candidates = self.choices.matches(text)
+        self.typed = text
+        suggestions = self.choices.rank(text, self.candidates)
+        self.configure(values=suggestions)
+        return suggestions
+
+    def on_key_release(self, event):
+        if event.keysym in NAVIGATION_KEYS or self.typed == self.get():
+            return
+        text = self.get()
+        if not text.strip() or text in self.choices.members:
+            self.show_all()
+        else:
+            self.filter(text)
+
+    def complete(self):
+        ''' Replace the text with its best match, if it isn't a symbol already. Returns whether it is one now. '''
+        text = self.get()
+        if text in self.choices.members:
+            return True
+        suggestions = self.filter(text) if text.strip() else []
+        if suggestions:
+            self.set(suggestions[0])
+            self.icursor(tk.END)
+            self.event_generate('<<ComboboxSelected>>')
+            return True
+        return False
+
+    def on_focus_in(self):
+        if self.get() in self.choices.members:
+            self.focus_value = self.get()
+
+    def on_focus_out(self):
+        # Opening the popdown takes the focus too; wait until it settles to know if the user left the field.
+        self.after_idle(self.check_left)
+
+    def check_left(self):
+        focus = str(self.tk.call('focus'))
+        if focus == str(self) or focus.startswith(str(self) + '.'):
+            return
+        if not self.complete():
+            self.set(self.focus_value)
+        self.show_all()
@@ -0,0 +1,79 @@
+#! /usr/bin/env python3
+
+import os
+import re
+
+# Object-like `#define NAME value` lines. Function-like macros (`NAME(`) are skipped.
+DEFINE_RE = re.compile(r'^[ \t]*#[ \t]*define[ \t]+(\w+)(?![\w(])[ \t]*([^\n]*)', re.MULTILINE)
+
+# Symbol families needed by the editor: (family, project file key, symbol prefix).
+# Families sharing a file are scanned together and the first matching prefix wins.
+# A family may be listed with several prefixes.
+CONSTANT_FAMILIES = [
+    ('trainers',        'opponents',    'TRAINER_'),
+    ('trainer_pics',    'trainer_info', 'TRAINER_PIC_'),
+    ('trainer_classes', 'trainer_info', 'TRAINER_CLASS_'),
+    ('encounter_music', 'trainer_info', 'TRAINER_ENCOUNTER_MUSIC_'),
+    ('items',           'items',        'ITEM_'),
+    ('ai_flags',        'battle_ai',    'AI_SCRIPT_'),
+    ('ai_flags',        'battle_ai',    'AI_FLAG_'),   # pokeemerald-expansion
+    ('species',         'species',      'SPECIES_'),
+    ('moves',           'moves',        'MOVE_'),
+    ('natures',         'natures',      'NATURE_'),
+]
+
+# Families cut down to the value of a count define found in the same file.
+FAMILY_COUNTS = {
+    'items': 'ITEMS_COUNT',
+    'moves': 'MOVES_COUNT',
+}
+
+
+class ProjectConstants:
+    ''' Symbol lists for every constant family, in header order. '''
+
+    def __init__(self):
+        self.families = {}
+
+    def get(self, family):
+        return self.families.get(family, [])
+
+
+def scan_header(path, families):
+    ''' Tokenize a header once and return the symbols of each (family, prefix) pair plus the requested counts. '''
+    with open(path, "r") as f:
+        content = f.read()
+
+    symbols = {family: [] for family, prefix in families}
+    count_names = {FAMILY_COUNTS[family]: family for family, prefix in families if family in FAMILY_COUNTS}
+    counts = {}
+
+    for match in DEFINE_RE.finditer(content):
+        name = match.group(1)
+        if name in count_names:
+            try:
+                counts[count_names[name]] = int(match.group(2).split()[0], 0)
+            except (ValueError, IndexError):
+                pass # Not a literal (e.g. expansion's computed counts): keep the full list.
+            continue
+        for family, prefix in families:
+            if name.startswith(prefix):
+                symbols[family].append(name)
+                break
+
+    for family, count in counts.items():
+        symbols[family] = symbols[family][:count]
+
+    return symbols
+
+
+def group_families_by_file(project_path, project_files, families=None):
+    ''' Map each header path to the (family, prefix) pairs it provides so shared headers are read once. '''
+    by_file = {}
+    for family, file_key, prefix in CONSTANT_FAMILIES:
+        if families is not None and family not in families:
+            continue
+        path = os.path.join(project_path, project_files[file_key].lstrip("/"))
+        by_file.setdefault(path, []).append((family, prefix))
+    return by_file
+
@@ -0,0 +1,92 @@
+#! /usr/bin/env python3
+
+import time
+from collections import deque
+
+
+class FormView:
+    ''' The editor widgets of one panel as named fields, each with a getter and a setter.
+
+    show() compares the values to display with what each widget holds right now and only calls the setters
+    of those that differ. Reading a widget is a single cheap Tcl call, while writing one redraws it and fires
+    its traces. The current value is read back instead of remembered, so edits the user made in a widget are
+    always overwritten when they don't match the selection.
+    '''
+
+    def __init__(self):
+        self.fields = {} # Name -> (getter, setter)
+
+    def add(self, name, getter, setter):
+        self.fields[name] = (getter, setter)
+
+    def add_entry(self, name, entry, readonly=False):
+        ''' An Entry or Spinbox. A readonly one is unlocked for the write. '''
+        def set_text(value):
+            if readonly:
+                entry.config(state="normal")
+            entry.delete(0, "end")
+            entry.insert(0, value)
+            if readonly:
+                entry.config(state="readonly")
+        self.add(name, entry.get, set_text)
+
+    def add_combobox(self, name, combobox):
+        self.add(name, combobox.get, combobox.set)
+
+    def add_variable(self, name, variable):
+        self.add(name, variable.get, variable.set)
+
+    def add_listbox(self, name, listbox):
+        ''' A listbox whose rows are the tuple of strings shown. '''
+        def set_rows(rows):
+            listbox.delete(0, "end")
+            if rows:
+                listbox.insert(0, *rows)
+        self.add(name, lambda: tuple(listbox.get(0, "end")), set_rows)
+
+    def show(self, values):
+        ''' Display {field: value}, writing only the widgets whose value differs. Returns the changed names. '''
+        changed = []
+        for name, value in values.items():
+            getter, setter = self.fields[name]
+            if getter() != value:
+                setter(value)
+                changed.append(name)
+        return changed
+
+
+class RefreshScheduler:
+    ''' Collapses bursts of requests, such as the selection events of a held arrow key, into a single call of
+    `callback` when the Tk event queue is next idle.
+
+    The delay between the first request of a burst and the end of its refresh is kept for the last
+    `history` refreshes, so the selection latency can be checked.
+    '''
+
+    def __init__(self, widget, callback, history=100):
+        self.widget = widget
+        self.callback = callback
+        self.first_request = None # perf_counter() of the oldest request not refreshed yet
+        self.requests = 0
+        self.latencies = deque(maxlen=history)
+
+    def request(self, *args):
+        ''' Ask for a refresh. Usable directly as an event binding. '''
+        self.requests += 1
+        if self.first_request is None:
+            self.first_request = time.perf_counter()
+            self.widget.after_idle(self.run)
+
+    def run(self):
+        started = self.first_request
+        self.first_request = None
+        try:
+            self.callback()
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    def latency_stats(self):
+        ''' Return (refreshes, average ms, worst ms) over the recorded refreshes. '''
+        if not self.latencies:
+            return 0, 0.0, 0.0
+        return len(self.latencies), sum(self.latencies) / len(self.latencies) * 1000, max(self.latencies) * 1000
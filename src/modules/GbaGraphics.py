@@ -0,0 +1,217 @@
+#! /usr/bin/env python3
+
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from modules.ProjectCache import CACHE_DIR
+
+try:
+    import numpy
+except ImportError:
+    numpy = None # Tiles are decoded with plain loops instead
+
+# Front pics are 64 pixels wide; animated ones stack their frames below each other.
+SPRITE_WIDTH_TILES = 8
+
+THUMBNAIL_DIR = os.path.join(CACHE_DIR, "sprites")
+
+# 16 shades of gray, for sprites whose palette can't be found.
+GRAY_PALETTE = [(i * 17, i * 17, i * 17) for i in range(16)]
+
+
+def lz77_decompress(data):
+    ''' Decompress GBA BIOS LZ77 data (type 0x10), as written by gbagfx for the .lz files. '''
+    if len(data) < 4 or data[0] != 0x10:
+        raise ValueError("not LZ77 compressed data")
+    size = data[1] | data[2] << 8 | data[3] << 16
+    out = bytearray()
+    position = 4
+    while len(out) < size:
+        flags = data[position]
+        position += 1
+        for bit in range(7, -1, -1):
+            if len(out) >= size:
+                break
+            if flags >> bit & 1:
+                # Back reference: 4 bits of length - 3, 12 bits of distance - 1.
+                length = (data[position] >> 4) + 3
+                distance = ((data[position] & 0xF) << 8 | data[position + 1]) + 1
+                position += 2
+                start = len(out) - distance
+                if start < 0:
+                    raise ValueError("LZ77 reference before the start of the data")
+                if distance >= length:
+                    out += out[start:start + length]
+                else:
+                    for i in range(length): # Overlapping copy, repeats the last `distance` bytes
+                        out.append(out[start + i])
+            else:
+                out.append(data[position])
+                position += 1
+    return bytes(out[:size])
+
+
+def read_palette(path):
+    ''' Read 16 colors from a JASC .pal file or a .gbapal file (BGR555, optionally LZ77 compressed). '''
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".pal"):
+        lines = data.decode().split()
+        # JASC-PAL, version, color count, then R G B triplets
+        values = [int(value) for value in lines[3:]]
+        colors = [tuple(values[i:i + 3]) for i in range(0, len(values) - 2, 3)]
+    else:
+        if path.endswith(".lz"):
+            data = lz77_decompress(data)
+        colors = []
+        for (color,) in struct.iter_unpack("<H", data[:len(data) & ~1]):
+            colors.append(((color & 0x1F) << 3, (color >> 5 & 0x1F) << 3, (color >> 10 & 0x1F) << 3))
+    return (colors + GRAY_PALETTE)[:16]
+
+
+def palette_candidates(sprite_path):
+    ''' Palette files that go with a front pic, by the decomp naming conventions:
+    graphics/pokemon/<species>/[anim_]front.4bpp.lz       -> graphics/pokemon/<species>/normal.{gbapal,pal}
+    graphics/trainers/front_pics/<pic>[_front_pic].4bpp.lz -> graphics/trainers/palettes/<pic>.{gbapal,pal}
+    '''
+    directory, name = os.path.split(sprite_path)
+    stem = name.split(".")[0]
+    if os.path.basename(directory) == "front_pics":
+        base = os.path.join(os.path.dirname(directory), "palettes", stem)
+        names = [base[:-len("_front_pic")]] if stem.endswith("_front_pic") else []
+        names.append(base)
+    else:
+        names = [os.path.join(directory, "normal")]
+    return [name + extension for name in names for extension in (".gbapal", ".gbapal.lz", ".pal")]
+
+
+def decode_4bpp(data, width_tiles=SPRITE_WIDTH_TILES):
+    ''' Turn 4bpp tile data into rows of palette indexes. Returns (width, height, indexes) where indexes is a
+    NumPy array of shape (height, width) or, without NumPy, a flat list row by row. '''
+    tile_count = len(data) // 32
+    tile_rows = tile_count // width_tiles
+    width, height = width_tiles * 8, tile_rows * 8
+    data = data[:tile_rows * width_tiles * 32]
+    if numpy is not None:
+        packed = numpy.frombuffer(data, dtype=numpy.uint8)
+        pixels = numpy.empty(len(packed) * 2, dtype=numpy.uint8)
+        pixels[0::2] = packed & 0xF # The low nibble is the left pixel
+        pixels[1::2] = packed >> 4
+        return width, height, pixels.reshape(tile_rows, width_tiles, 8, 8).transpose(0, 2, 1, 3).reshape(height, width)
+
+    indexes = [0] * (width * height)
+    for tile in range(tile_rows * width_tiles):
+        tile_x, tile_y = tile % width_tiles * 8, tile // width_tiles * 8
+        offset = tile * 32
+        for y in range(8):
+            row = (tile_y + y) * width + tile_x
+            for x in range(0, 8, 2):
+                byte = data[offset]
+                indexes[row + x] = byte & 0xF
+                indexes[row + x + 1] = byte >> 4
+                offset += 1
+    return width, height, indexes
+
+
+def render_rgba(indexes, palette):
+    ''' RGBA bytes of decoded indexes, with color 0 transparent like on the GBA. '''
+    colors = [bytes(color) + (b'\x00' if i == 0 else b'\xff') for i, color in enumerate(palette)]
+    if numpy is not None:
+        table = numpy.frombuffer(b''.join(colors), dtype=numpy.uint8).reshape(16, 4)
+        return table[indexes].tobytes()
+    return b''.join(colors[index] for index in indexes)
+
+
+def encode_png(width, height, rgba):
+    ''' A minimal RGBA PNG, for Tk to decode and for the thumbnail cache. '''
+    def chunk(kind, payload):
+        return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+    stride = width * 4
+    raw = b''.join(b'\x00' + rgba[y * stride:(y + 1) * stride] for y in range(height)) # Filter 0 on every row
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+
+def sprite_to_png(sprite_data, palette):
+    ''' PNG bytes of a sprite from its .4bpp or .4bpp.lz file contents. '''
+    if sprite_data[:1] == b'\x10':
+        try:
+            sprite_data = lz77_decompress(sprite_data)
+        except (ValueError, IndexError):
+            pass # Uncompressed tiles that happen to start with 0x10
+    width, height, indexes = decode_4bpp(sprite_data)
+    return encode_png(width, height, render_rgba(indexes, palette))
+
+
+class ThumbnailCache:
+    ''' Sprites converted from GBA formats, stored as PNG files named after the hash of their sources. '''
+
+    def __init__(self, directory=THUMBNAIL_DIR):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".png")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Named per thread: the prefetcher and the main loop may convert the same sprite at once.
+            temp_path = self.path(key) + ".%d.tmp" % threading.get_ident()
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.path(key))
+        except OSError:
+            pass # A read-only cache only costs the conversion next time
+
+
+def load_sprite(png_path, thumbnails=None):
+    ''' Return image file contents Tk can decode for a sprite path from the graphics headers, or None.
+
+    The PNG is used when it exists. Otherwise the built .4bpp.lz (or .4bpp) next to it is decoded with its
+    palette, and the result is kept in the thumbnail cache under the hash of the tiles and the palette.
+    '''
+    try:
+        with open(png_path, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    stem = png_path[:-len(".png")] if png_path.endswith(".png") else png_path
+    for sprite_path in (stem + ".4bpp.lz", stem + ".4bpp"):
+        try:
+            with open(sprite_path, "rb") as f:
+                sprite_data = f.read()
+            break
+        except OSError:
+            continue
+    else:
+        return None
+
+    palette_path = next((path for path in palette_candidates(sprite_path) if os.path.exists(path)), None)
+    palette_data = b''
+    if palette_path is not None:
+        with open(palette_path, "rb") as f:
+            palette_data = f.read()
+    key = hashlib.sha1(sprite_data + b'|' + palette_data).hexdigest()
+    thumbnails = thumbnails if thumbnails is not None else ThumbnailCache()
+    cached = thumbnails.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        palette = read_palette(palette_path) if palette_path is not None else GRAY_PALETTE
+        data = sprite_to_png(sprite_data, palette)
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None
+    thumbnails.put(key, data)
+    return data
@@ -0,0 +1,411 @@
+#! /usr/bin/env python3
+
+import re
+from sys import intern
+from modules.classes import Trainer, Pokemon
+
+# Stat names used by pokeemerald-expansion's trainers.party, mapped to the Pokemon.ivs/evs keys.
+SHOWDOWN_STATS = {"HP": "HP", "Atk": "ATK", "Def": "DEF", "SpA": "SPATK", "SpD": "SPDEF", "Spe": "SPD"}
+
+# Trainer fields of trainers.party that are constants: field -> constant prefix.
+SHOWDOWN_TRAINER_CONSTANTS = {
+    "Class": "TRAINER_CLASS_",
+    "Pic":   "TRAINER_PIC_",
+    "Music": "TRAINER_ENCOUNTER_MUSIC_",
+}
+
+
+def parse_party_lines(lines):
+    ''' Parse trainer_parties.h lines in a single pass and return a dict mapping each party symbol to its Pokémon list. '''
+    parties = {}
+    party = None
+    mon_struct = None
+
+    for line in lines:
+        stripped = line.strip()
+        data = stripped.split(" ")
+        field = data[0]
+        if stripped.startswith('static const struct'):
+            for token in data:
+                if token.endswith('[]'):
+                    party = []
+                    parties[token[:-2]] = party
+                    break
+            continue
+        if party is None:
+            continue
+        if (field == '}' or field == '},') and mon_struct is not None:
+            new_mon = Pokemon(mon_struct['species'])
+            new_mon.level = int(mon_struct['lvl'])
+            new_mon.held_item = mon_struct['heldItem']
+            new_mon.iv = int(mon_struct['iv'])
+            new_mon.moves = mon_struct['moves']
+            party.append(new_mon)
+            mon_struct = None
+        elif field == '{':
+            mon_struct = {
+                'iv': '', # Somehow up to 255
+                'lvl': '',
+                'species': '',
+                'heldItem': 'ITEM_NONE',
+                'moves': ['MOVE_NONE', 'MOVE_NONE', 'MOVE_NONE', 'MOVE_NONE']
+            }
+        elif field == '.iv':
+            mon_struct['iv'] = int(data[2].strip(','))
+        elif field == '.lvl':
+            mon_struct['lvl'] = int(data[2].strip(','))
+        elif field == '.species':
+            mon_struct['species'] = intern(data[2].strip('",'))
+        elif field == '.heldItem':
+            mon_struct['heldItem'] = intern(data[2].strip('",'))
+        elif field == '.moves':
+            moves = []
+            for move in data[2:]:
+                if move.strip('",{}') != '':
+                    moves.append(move.strip('",{}'))
+            while len(moves) < 4:
+                moves.append('MOVE_NONE')
+            mon_struct['moves'] = moves
+        elif stripped.startswith('};'):
+            party = None
+
+    return parties
+
+
+def parse_trainer_parties(path):
+    ''' Read data/trainer_parties.h in a single pass and return a dict mapping each party symbol to its Pokémon list. '''
+    with open(path, "r") as f:
+        return parse_party_lines(f)
+
+
+class PartyRef:
+    ''' Byte span of one party inside trainer_parties.h. The party is only parsed when load() is called. '''
+
+    def __init__(self, path, symbol, start, end):
+        self.path = path
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+
+    def read_lines(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.start)
+            return f.read(self.end - self.start).decode().splitlines()
+
+    def load(self):
+        lines = self.read_lines()
+        if not lines or (self.symbol + '[]') not in lines[0].split(" "):
+            # The file changed since it was indexed, so look the party up again.
+            ref = index_trainer_parties(self.path).get(self.symbol)
+            if ref is None:
+                return []
+            self.start, self.end = ref.start, ref.end
+            lines = self.read_lines()
+        return parse_party_lines(lines).get(self.symbol, [])
+
+
+def index_trainer_parties(path):
+    ''' Scan data/trainer_parties.h once and map each party symbol to a PartyRef, without parsing any Pokémon. '''
+    index = {}
+    symbol = None
+    start = 0
+    offset = 0
+
+    with open(path, "rb") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith(b'static const struct'):
+                for token in stripped.split(b' '):
+                    if token.endswith(b'[]'):
+                        symbol = token[:-2].decode()
+                        start = offset
+                        break
+            elif symbol is not None and stripped.startswith(b'};'):
+                index[symbol] = PartyRef(path, symbol, start, offset + len(line))
+                symbol = None
+            offset += len(line)
+
+    return index
+
+
+def locate_entries(trainers, trainers_path, parties_path):
+    ''' Point the spans and party refs of trainers at their entries in files the editor just rewrote. '''
+    spans = {trainer.id: trainer.span for trainer in parse_trainers(trainers_path)}
+    parties = index_trainer_parties(parties_path)
+    for trainer in trainers:
+        trainer.span = spans.get(trainer.id)
+        trainer.party_ref = parties.get(trainer.party_name)
+        trainer.dirty = False
+
+
+def load_all_parties(trainers):
+    ''' Hydrate every party not loaded yet, parsing each parties file once instead of once per trainer. '''
+    parsed_files = {}
+    for trainer in trainers:
+        if trainer.is_party_loaded():
+            continue
+        if trainer.party_ref is None: # Party symbol not found, like the pokemon property does
+            trainer.pokemon = []
+            continue
+        path = trainer.party_ref.path
+        if path not in parsed_files:
+            parsed_files[path] = parse_trainer_parties(path)
+        trainer.pokemon = parsed_files[path].get(trainer.party_ref.symbol, [])
+
+
+def parse_trainers(path):
+    ''' Stream data/trainers.h line by line and return its trainers with their party symbols unresolved.
+
+    AI flag tokens are kept as written in ai_flag_tokens; they become a mask of battle_ai.h flags when the project is linked.
+    Each trainer gets the byte span of its entry, from the `[TRAINER_X]` line to the closing brace line.
+    '''
+    trainers = []
+
+    # .partyFlags - It will be adquired from party macros
+    # .trainerClass
+    # .encounterMusic_gender
+    # .trainerPic
+    # .trainerName
+    # .items
+    # .doubleBattle
+    # .aiFlags
+    # .partySize - It will be adquired from party macros
+    # .party
+
+    new_trainer = None
+    uses_party_macro = True
+    offset = 0
+    # Streamed in binary mode: the spans are byte offsets and only the current line is decoded and held.
+    with open(path, "rb") as f:
+        for raw_line in f:
+            line_start = offset
+            offset += len(raw_line)
+            line = raw_line.decode()
+            data = line.strip().split(" ")
+            field = data[0]
+            if field[:9] == '[TRAINER_':
+                new_trainer = Trainer(field[1:-1])
+                new_trainer.span = (line_start, None)
+                uses_party_macro = True
+            elif field == '.trainerClass':
+                new_trainer.trainer_class = intern(data[2].strip('",'))
+            elif field == '.encounterMusic_gender':
+                new_trainer.gender = "MALE"
+                for stuff in data[2:]:
+                    if stuff.startswith("TRAINER_ENCOUNTER_MUSIC_"):
+                        new_trainer.encounter_music = intern(stuff.strip('",'))
+                    elif stuff == "F_TRAINER_FEMALE":
+                        new_trainer.gender = "FEMALE"
+            elif field == '.trainerPic':
+                new_trainer.trainer_pic = intern(data[2].strip('",'))
+            elif field == '.trainerName':
+                new_trainer.name = line.split('"')[1]
+            elif field == '.items':
+                items = []
+                for item in data[2:]:
+                    if item.strip('",{}') != '':
+                        items.append(item.strip('",{}'))
+                while len(items) < 4:
+                    items.append('ITEM_NONE')
+                new_trainer.items = items
+            elif field == '.doubleBattle':
+                if data[2] == 'TRUE,':
+                    new_trainer.double_battle = True
+                else:
+                    new_trainer.double_battle = False
+            elif field == '.aiFlags':
+                flags = []
+                for flag in data[2:]:
+                    if flag.strip('",{}') not in ('', '|'):
+                        flags.append(intern(flag.strip('",{}')))
+                new_trainer.ai_flag_tokens = tuple(flags)
+            elif field == '.partyFlags':
+                uses_party_macro = False
+            elif field == '.partySize':
+                uses_party_macro = False
+            elif field == '.party':
+                if uses_party_macro:
+                    new_trainer.party_name = data[2].split('(')[1].strip('),')
+            elif field == '},' or (field == '}' and new_trainer is not None):
+                # A bare `}` closes the last trainer when the array has no trailing comma.
+                new_trainer.span = (new_trainer.span[0], offset)
+                trainers.append(new_trainer)
+                new_trainer = None
+
+    return trainers
+
+
+def showdown_to_constant(name, prefix):
+    ''' Turn a trainers.party name such as "Mr. Mime" into its constant, SPECIES_MR_MIME. '''
+    name = re.sub(r"['’.]", '', name)
+    return intern(prefix + re.sub(r'[^0-9A-Za-z]+', '_', name).strip('_').upper())
+
+
+def parse_showdown_stats(value):
+    ''' Parse "31 HP / 31 Atk / 0 Spe" into an {"HP": 31, ...} dict with only the listed stats. '''
+    stats = {}
+    for entry in value.split('/'):
+        amount, stat = entry.split()
+        stats[SHOWDOWN_STATS[stat]] = int(amount)
+    return stats
+
+
+def parse_showdown_mon_header(line, constant=showdown_to_constant):
+    ''' Split a "Nickname (Species) (F) @ Item" line into a new Pokemon, naming constants with `constant`. '''
+    header, _, item = line.partition(' @ ')
+    extra = {}
+    if header.endswith(' (M)') or header.endswith(' (F)'):
+        extra['Gender'] = header[-2]
+        header = header[:-4]
+    if header.endswith(')') and ' (' in header:
+        nickname, _, species = header[:-1].rpartition(' (')
+        extra['Nickname'] = nickname
+        header = species
+
+    mon = Pokemon(constant(header, 'SPECIES_'))
+    mon.ivs = {}
+    mon.evs = {}
+    mon.nature = None
+    mon.ability = None
+    mon.extra = extra
+    if item:
+        mon.held_item = constant(item, 'ITEM_')
+    return mon
+
+
+def read_showdown_trainers(path, names=None):
+    ''' Stream pokeemerald-expansion's trainers.party, yielding one Trainer with its Pokémon at a time.
+
+    Only the block being read is kept in memory. Fields the editor doesn't use go to the `extra` dicts.
+    Each trainer gets the byte span of its block, from the `=== TRAINER_X ===` line to its last field or move
+    line, so the comments and blank lines around it stay outside. If `names` is a dict, it collects the name
+    first written for each constant, such as "Mr. Mime" for SPECIES_MR_MIME, for the writer to reuse.
+    '''
+    trainer = None
+    mon = None
+    moves = []
+    in_comment = False
+    offset = 0
+    block_end = 0
+
+    def constant(name, prefix):
+        symbol = showdown_to_constant(name, prefix)
+        if names is not None and symbol not in names:
+            names[symbol] = name
+        return symbol
+
+    def finish_mon():
+        while len(moves) < 4:
+            moves.append('MOVE_NONE')
+        mon.moves = moves[:4]
+        trainer.pokemon.append(mon)
+
+    def finish_trainer():
+        trainer.span = (trainer.span[0], block_end)
+        return trainer
+
+    with open(path, "rb") as f:
+        for raw_line in f:
+            line_start = offset
+            offset += len(raw_line)
+            line = raw_line.decode().strip()
+            if in_comment:
+                in_comment = '*/' not in line
+                continue
+            if line.startswith('/*'):
+                in_comment = '*/' not in line
+                continue
+
+            if line.startswith('===') and line.endswith('==='):
+                if mon is not None:
+                    finish_mon()
+                    mon = None
+                if trainer is not None:
+                    yield finish_trainer()
+                trainer = Trainer(line.strip('= '))
+                trainer.span = (line_start, offset)
+                block_end = offset
+                section = 'trainer'
+                continue
+            if trainer is None:
+                continue
+
+            if line == '':
+                if mon is not None:
+                    finish_mon()
+                    mon = None
+                section = 'party'
+                continue
+            block_end = offset
+
+            if section == 'party' and mon is None:
+                mon = parse_showdown_mon_header(line, constant)
+                moves = []
+                continue
+
+            if mon is not None:
+                if line.startswith('- '):
+                    moves.append(constant(line[2:], 'MOVE_'))
+                    continue
+                field, _, value = line.partition(':')
+                value = value.strip()
+                if field == 'Level':
+                    mon.level = int(value)
+                elif field == 'IVs':
+                    mon.ivs = parse_showdown_stats(value)
+                elif field == 'EVs':
+                    mon.evs = parse_showdown_stats(value)
+                elif field == 'Nature':
+                    mon.nature = constant(value, 'NATURE_')
+                elif field == 'Ability':
+                    mon.ability = constant(value, 'ABILITY_')
+                elif field == 'Tera Type':
+                    mon.tera_type = constant(value, 'TYPE_')
+                else:
+                    mon.extra[field] = value
+                continue
+
+            field, _, value = line.partition(':')
+            value = value.strip()
+            if field == 'Name':
+                trainer.name = value
+            elif field in SHOWDOWN_TRAINER_CONSTANTS:
+                symbol = constant(value, SHOWDOWN_TRAINER_CONSTANTS[field])
+                if field == 'Class':
+                    trainer.trainer_class = symbol
+                elif field == 'Pic':
+                    trainer.trainer_pic = symbol
+                else:
+                    trainer.encounter_music = symbol
+            elif field == 'Gender':
+                trainer.gender = value.upper()
+            elif field == 'Items':
+                items = [constant(item.strip(), 'ITEM_') for item in value.split('/')]
+                trainer.items = (items + ['ITEM_NONE'] * 4)[:4]
+            elif field == 'Double Battle':
+                trainer.double_battle = value == 'Yes'
+            elif field == 'AI':
+                trainer.ai_flag_tokens = tuple(constant(flag.strip(), 'AI_FLAG_') for flag in value.split('/'))
+            else:
+                trainer.extra[field] = value
+
+    if trainer is not None:
+        if mon is not None:
+            finish_mon()
+        yield finish_trainer()
+
+
+def read_showdown_names(path):
+    ''' Map each constant used in a trainers.party to the name it is first written with there. '''
+    names = {}
+    for trainer in read_showdown_trainers(path, names):
+        pass
+    return names
+
+
+def locate_showdown_entries(trainers, path):
+    ''' Point the spans of trainers at their blocks in a trainers.party the editor just rewrote. '''
+    spans = {trainer.id: trainer.span for trainer in read_showdown_trainers(path)}
+    for trainer in trainers:
+        trainer.span = spans.get(trainer.id)
+        trainer.dirty = False
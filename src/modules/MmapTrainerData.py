@@ -0,0 +1,177 @@
+#! /usr/bin/env python3
+
+import mmap
+import re
+from contextlib import contextmanager
+from sys import intern
+from modules.classes import Trainer, Pokemon
+from modules.LoadTrainerData import PartyRef
+
+# Byte-level parser backend. The file is memory mapped and scanned with compiled patterns; only the
+# captured field values are decoded. No pattern is anchored to line starts: each alternative begins
+# with the first character of its token so the regex engine can skip ahead quickly. A field match
+# consumes the rest of its line, so the braces and dots inside values are never seen as tokens.
+
+# `[TRAINER_X]` opens a trainer, `.field = value,` sets a field and `}` closes the trainer.
+TRAINER_TOKEN_RE = re.compile(rb'\[(TRAINER_\w+)\]|\.(\w+)[ \t]*=[ \t]*([^\n]*)|(\})')
+
+# `static const struct ... sParty_X[] = {` line of a party definition.
+PARTY_START_RE = re.compile(rb'static const struct\b[^\n]*?(\w+)\[\][^\n]*')
+
+# Party symbol, `.field = value`, `};` closing the party, and the `{`/`}` around each mon.
+PARTY_TOKEN_RE = re.compile(rb'static const struct\b[^\n]*?(\w+)\[\][^\n]*|\.(\w+)[ \t]*=[ \t]*([^\n]*)|(\};)|(\{)|(\})')
+
+
+@contextmanager
+def mapped_file(path):
+    ''' Map a file read-only. Empty files give an empty bytes object since they can't be mapped. '''
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b''
+            return
+        try:
+            yield buffer
+        finally:
+            buffer.close()
+
+
+def parse_trainers_mmap(path):
+    ''' Same result as LoadTrainerData.parse_trainers, scanning the mapped bytes instead of split lines. '''
+    trainers = []
+    new_trainer = None
+    uses_party_macro = True
+
+    with mapped_file(path) as buffer:
+        for match in TRAINER_TOKEN_RE.finditer(buffer):
+            trainer_id, field, value, closing = match.groups()
+            if value is not None:
+                value = value.rstrip(b' \t\r,')
+            if trainer_id is not None:
+                new_trainer = Trainer(trainer_id.decode())
+                new_trainer.span = (buffer.rfind(b'\n', 0, match.start()) + 1, None)
+                uses_party_macro = True
+            elif closing is not None:
+                if new_trainer is not None:
+                    end = buffer.find(b'\n', match.end())
+                    new_trainer.span = (new_trainer.span[0], len(buffer) if end == -1 else end + 1)
+                    trainers.append(new_trainer)
+                new_trainer = None
+            elif new_trainer is None:
+                continue
+            elif field == b'trainerClass':
+                new_trainer.trainer_class = intern(value.decode().strip('"'))
+            elif field == b'encounterMusic_gender':
+                new_trainer.gender = "MALE"
+                for stuff in value.split():
+                    if stuff.startswith(b"TRAINER_ENCOUNTER_MUSIC_"):
+                        new_trainer.encounter_music = intern(stuff.decode().strip('",'))
+                    elif stuff == b"F_TRAINER_FEMALE":
+                        new_trainer.gender = "FEMALE"
+            elif field == b'trainerPic':
+                new_trainer.trainer_pic = intern(value.decode().strip('"'))
+            elif field == b'trainerName':
+                new_trainer.name = value.split(b'"')[1].decode()
+            elif field == b'items':
+                items = []
+                for item in value.split():
+                    item = item.strip(b'",{}')
+                    if item:
+                        items.append(item.decode())
+                while len(items) < 4:
+                    items.append('ITEM_NONE')
+                new_trainer.items = items
+            elif field == b'doubleBattle':
+                new_trainer.double_battle = value == b'TRUE'
+            elif field == b'aiFlags':
+                flags = []
+                for flag in value.split():
+                    flag = flag.strip(b'",{}')
+                    if flag not in (b'', b'|'):
+                        flags.append(intern(flag.decode()))
+                new_trainer.ai_flag_tokens = tuple(flags)
+            elif field == b'partyFlags' or field == b'partySize':
+                uses_party_macro = False
+            elif field == b'party':
+                if uses_party_macro:
+                    new_trainer.party_name = value.split(b'(')[1].strip(b'),').decode()
+
+    return trainers
+
+
+def index_trainer_parties_mmap(path):
+    ''' Same result as LoadTrainerData.index_trainer_parties, jumping between party starts and `};` ends. '''
+    index = {}
+    with mapped_file(path) as buffer:
+        position = 0
+        while True:
+            match = PARTY_START_RE.search(buffer, position)
+            if match is None:
+                break
+            end = buffer.find(b'};', match.end())
+            if end == -1:
+                break
+            end = buffer.find(b'\n', end)
+            end = len(buffer) if end == -1 else end + 1
+            start = buffer.rfind(b'\n', 0, match.start()) + 1
+            symbol = match.group(1).decode()
+            index[symbol] = PartyRef(path, symbol, start, end)
+            position = end
+    return index
+
+
+def parse_trainer_parties_mmap(path):
+    ''' Same result as LoadTrainerData.parse_trainer_parties, scanning the mapped bytes instead of split lines. '''
+    parties = {}
+    party = None
+    mon_struct = None
+
+    with mapped_file(path) as buffer:
+        for match in PARTY_TOKEN_RE.finditer(buffer):
+            symbol, field, value, party_end, opening, closing = match.groups()
+            if value is not None:
+                value = value.rstrip(b' \t\r,')
+            if symbol is not None:
+                party = []
+                parties[symbol.decode()] = party
+            elif party is None:
+                continue
+            elif party_end is not None:
+                party = None
+            elif closing is not None:
+                if mon_struct is not None:
+                    new_mon = Pokemon(mon_struct['species'])
+                    new_mon.level = int(mon_struct['lvl'])
+                    new_mon.held_item = mon_struct['heldItem']
+                    new_mon.iv = int(mon_struct['iv'])
+                    new_mon.moves = mon_struct['moves']
+                    party.append(new_mon)
+                    mon_struct = None
+            elif opening is not None:
+                mon_struct = {
+                    'iv': '',
+                    'lvl': '',
+                    'species': '',
+                    'heldItem': 'ITEM_NONE',
+                    'moves': ['MOVE_NONE', 'MOVE_NONE', 'MOVE_NONE', 'MOVE_NONE']
+                }
+            elif field == b'iv':
+                mon_struct['iv'] = int(value)
+            elif field == b'lvl':
+                mon_struct['lvl'] = int(value)
+            elif field == b'species':
+                mon_struct['species'] = intern(value.decode().strip('"'))
+            elif field == b'heldItem':
+                mon_struct['heldItem'] = intern(value.decode().strip('"'))
+            elif field == b'moves':
+                moves = []
+                for move in value.split():
+                    move = move.strip(b'",{}')
+                    if move:
+                        moves.append(move.decode())
+                while len(moves) < 4:
+                    moves.append('MOVE_NONE')
+                mon_struct['moves'] = moves
+
+    return parties
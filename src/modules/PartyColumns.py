@@ -0,0 +1,160 @@
+#! /usr/bin/env python3
+
+from array import array
+from collections import Counter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None # Queries fall back to plain loops over the same columns
+
+PARTY_SLOTS = 6
+EMPTY = -1 # Species ID of an unused slot
+
+# Per-slot columns, one row per (trainer, slot). `moves` holds four IDs per row.
+SLOT_COLUMNS = ('species', 'level', 'iv', 'held_item')
+
+
+class PartyColumns:
+    ''' Every party member of a project in flat integer columns, for project-wide filters and aggregates.
+
+    Each trainer owns a fixed block of `slots` rows (row = trainer index * slots + slot) so an edited party is
+    rewritten in place. Symbols are stored as SymbolTable IDs. The columns are array.array buffers; with NumPy
+    installed column() returns zero-copy ndarray views and the queries run vectorized.
+    '''
+
+    def __init__(self, project_data):
+        self.project_data = project_data
+        self.symbols = project_data.symbols
+        self.build()
+
+    def build(self):
+        ''' (Re)build every column. Loads the parties that are still lazy. '''
+        trainers = self.project_data.trainers
+        self.slots = max([PARTY_SLOTS] + [len(trainer.pokemon) for trainer in trainers])
+        rows = len(trainers) * self.slots
+        self.columns = {name: array('i', [EMPTY if name == 'species' else 0]) * rows for name in SLOT_COLUMNS}
+        self.columns['moves'] = array('i', [0]) * (rows * 4)
+        self.columns['trainer_class'] = array('i', [0]) * len(trainers)
+        self.columns['double_battle'] = array('i', [0]) * len(trainers)
+        for trainer_index in range(len(trainers)):
+            self.write_trainer(trainer_index)
+
+    def write_trainer(self, trainer_index):
+        trainer = self.project_data.trainers[trainer_index]
+        columns = self.columns
+        families = self.symbols.families
+        columns['trainer_class'][trainer_index] = families['trainer_classes'].id(trainer.trainer_class)
+        columns['double_battle'][trainer_index] = int(trainer.double_battle)
+
+        first_row = trainer_index * self.slots
+        party = trainer.pokemon
+        for slot in range(self.slots):
+            row = first_row + slot
+            if slot < len(party):
+                mon = party[slot]
+                columns['species'][row] = families['species'].id(mon.species)
+                columns['level'][row] = mon.level
+                columns['iv'][row] = mon.iv
+                columns['held_item'][row] = families['items'].id(mon.held_item)
+                columns['moves'][row * 4:row * 4 + 4] = array('i', families['moves'].ids_of(mon.moves))
+            else:
+                columns['species'][row] = EMPTY
+                columns['level'][row] = 0
+                columns['iv'][row] = 0
+                columns['held_item'][row] = 0
+                columns['moves'][row * 4:row * 4 + 4] = array('i', [0, 0, 0, 0])
+
+    def update_trainer(self, trainer_index):
+        ''' Resync one trainer after its fields or party were edited. '''
+        if len(self.project_data.trainers[trainer_index].pokemon) > self.slots:
+            self.build()
+        else:
+            self.write_trainer(trainer_index)
+
+    def column(self, name):
+        ''' Return a column as an ndarray view (NumPy) or the array itself. `moves` has shape (rows, 4). '''
+        values = self.columns[name]
+        if numpy is None:
+            return values
+        view = numpy.frombuffer(values, dtype=numpy.dtype('i%d' % values.itemsize))
+        return view.reshape(-1, 4) if name == 'moves' else view
+
+    def row_trainer(self, row):
+        return row // self.slots
+
+    def select(self, species=None, held_item=None, move=None, min_level=None, max_level=None, has_held_item=False):
+        ''' Return the rows of the party members matching every given condition. Symbols are given by name;
+        a symbol without an ID can't be in any party, so it matches no row. '''
+        families = self.symbols.families
+        conditions = {}
+        for column, family, name in (('species', 'species', species), ('held_item', 'items', held_item)):
+            if name is not None:
+                conditions[column] = families[family].lookup(name)
+        move_id = families['moves'].lookup(move) if move is not None else None
+        if None in conditions.values() or (move is not None and move_id is None):
+            return numpy.empty(0, dtype=numpy.intp) if numpy is not None else []
+        no_item = families['items'].lookup('ITEM_NONE')
+        if no_item is None:
+            no_item = EMPTY # Never a held item ID, so every member counts as holding one
+
+        if numpy is not None:
+            mask = self.column('species') != EMPTY
+            for name, value in conditions.items():
+                mask &= self.column(name) == value
+            if move_id is not None:
+                mask &= (self.column('moves') == move_id).any(axis=1)
+            if min_level is not None:
+                mask &= self.column('level') >= min_level
+            if max_level is not None:
+                mask &= self.column('level') <= max_level
+            if has_held_item:
+                mask &= self.column('held_item') != no_item
+            return numpy.flatnonzero(mask)
+
+        columns = self.columns
+        rows = []
+        for row, species_id in enumerate(columns['species']):
+            if species_id == EMPTY:
+                continue
+            if any(columns[name][row] != value for name, value in conditions.items()):
+                continue
+            if move_id is not None and move_id not in columns['moves'][row * 4:row * 4 + 4]:
+                continue
+            level = columns['level'][row]
+            if (min_level is not None and level < min_level) or (max_level is not None and level > max_level):
+                continue
+            if has_held_item and columns['held_item'][row] == no_item:
+                continue
+            rows.append(row)
+        return rows
+
+    def trainers_of(self, rows):
+        ''' Return the sorted trainer indexes owning the given rows. '''
+        if numpy is not None:
+            return numpy.unique(numpy.asarray(rows, dtype=numpy.intp) // self.slots)
+        return sorted({row // self.slots for row in rows})
+
+    def level_distribution(self):
+        ''' Return {trainer class: {level: party member count}} over the whole project. '''
+        class_names = self.symbols.families['trainer_classes'].names
+        if numpy is not None:
+            filled = numpy.flatnonzero(self.column('species') != EMPTY)
+            classes = self.column('trainer_class')[filled // self.slots]
+            levels = self.column('level')[filled]
+            base = int(levels.max()) + 1 if len(levels) else 1
+            keys, counts = numpy.unique(classes.astype(numpy.int64) * base + levels, return_counts=True)
+            distribution = {}
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                distribution.setdefault(class_names[key // base], {})[key % base] = count
+            return distribution
+
+        counter = Counter()
+        columns = self.columns
+        for row, species_id in enumerate(columns['species']):
+            if species_id != EMPTY:
+                counter[(columns['trainer_class'][row // self.slots], columns['level'][row])] += 1
+        distribution = {}
+        for (class_id, level), count in sorted(counter.items()):
+            distribution.setdefault(class_names[class_id], {})[level] = count
+        return distribution
@@ -0,0 +1,86 @@
+#! /usr/bin/env python3
+
+import hashlib
+import os
+import pickle
+
+# Bump whenever the parsed objects change shape so old caches are discarded.
+CACHE_VERSION = 7
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "assets", "cache")
+
+
+def hash_file(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def fingerprint(path):
+    ''' Return the (mtime, size, content hash) fingerprint of a source file. '''
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, hash_file(path))
+
+
+class ProjectCache:
+    ''' Parse results of a project stored on disk, one entry per load job, each tied to the fingerprints of its source files. '''
+
+    def __init__(self, project_path, project_type, cache_dir=CACHE_DIR):
+        key = hashlib.sha1((os.path.abspath(project_path) + '|' + project_type).encode()).hexdigest()
+        self.path = os.path.join(cache_dir, key + '.pickle')
+        self.entries = {}
+        self.modified = False
+
+    def load(self):
+        ''' Read the cache file. A missing, stale or unreadable cache just starts empty. '''
+        try:
+            with open(self.path, "rb") as f:
+                version, entries = pickle.load(f)
+        except Exception:
+            return
+        if version == CACHE_VERSION:
+            self.entries = entries
+
+    def save(self):
+        if not self.modified:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, "wb") as f:
+            pickle.dump((CACHE_VERSION, self.entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.path)
+        self.modified = False
+
+    def get(self, job_name, paths):
+        ''' Return the cached result of a job if none of its source files changed, otherwise None.
+
+        Files whose mtime and size still match are trusted without reading them. Otherwise the content
+        hash decides, so touching a file without changing it keeps its entry valid.
+        '''
+        entry = self.entries.get(job_name)
+        if entry is None:
+            return None
+        fingerprints, result = entry
+        if list(fingerprints) != list(paths):
+            return None
+
+        refreshed = {}
+        for path in paths:
+            mtime, size, content_hash = fingerprints[path]
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if stat.st_mtime_ns == mtime and stat.st_size == size:
+                refreshed[path] = (mtime, size, content_hash)
+            elif stat.st_size == size and hash_file(path) == content_hash:
+                refreshed[path] = (stat.st_mtime_ns, size, content_hash)
+                self.modified = True
+            else:
+                return None
+
+        self.entries[job_name] = (refreshed, result)
+        return result
+
+    def put(self, job_name, paths, result):
+        self.entries[job_name] = ({path: fingerprint(path) for path in paths}, result)
+        self.modified = True
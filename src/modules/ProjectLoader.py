@@ -0,0 +1,230 @@
+#! /usr/bin/env python3
+
+import json
+import os
+import types
+from modules.classes import ProjectData
+from modules.ConstantsScanner import ProjectConstants, scan_header, group_families_by_file
+from modules.LoadTrainerData import parse_trainers, index_trainer_parties, read_showdown_trainers
+from modules.MmapTrainerData import parse_trainers_mmap, index_trainer_parties_mmap
+from modules.ProjectCache import ProjectCache
+from modules.Sprites import parse_trainer_pics, parse_mon_pics
+from modules.SymbolTable import SymbolTable
+
+PROJECT_TYPES = [
+    "pokeemerald",
+    "pokeruby",
+    "pokefirered",
+    "pokeemerald-expansion"
+]
+
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "assets")
+
+# Parsers for trainers.h and trainer_parties.h: line splitting, or regex scans over a memory mapped file.
+PARSER_BACKENDS = {
+    'lines': (parse_trainers, index_trainer_parties),
+    'mmap':  (parse_trainers_mmap, index_trainer_parties_mmap),
+}
+
+BASE_FAMILIES = ['trainers', 'trainer_pics', 'trainer_classes', 'encounter_music', 'items', 'ai_flags', 'species', 'moves']
+EXPANSION_FAMILIES = BASE_FAMILIES + ['natures']
+
+
+def read_project_files(project_type):
+    ''' Return the source file layout of a project type from assets/project_files.json. '''
+    config_path = os.path.join(ASSETS_PATH, "project_files.json")
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            config = json.load(f)
+            return config.get(project_type, "")
+    return ""
+
+
+class LoadCancelled(Exception):
+    ''' Raised by ProjectLoader.load when its cancel event is set between two jobs. '''
+
+
+class LoadJob:
+    ''' One independent parse step: a function applied to some project files. '''
+
+    def __init__(self, name, stage, function, paths, args=()):
+        self.name = name
+        self.stage = stage
+        self.function = function
+        self.paths = paths
+        self.args = args
+
+    def run(self):
+        result = self.function(*self.paths, *self.args)
+        if isinstance(result, types.GeneratorType):
+            # Streaming parsers are drained here, so the result can be cached and sent back from a pool worker.
+            result = list(result)
+        return result
+
+
+def run_load_job(job):
+    ''' Process pool entry point. '''
+    return job.run()
+
+
+class ProjectLoader:
+    ''' Parse all the project sources into a ProjectData, reusing cached results for unchanged files.
+
+    With `workers` greater than 1 the jobs that are not cached run in a process pool of that size.
+    Otherwise, or if the pool can't be started, they run one after another in the calling thread.
+    `backend` picks the trainer data parsers from PARSER_BACKENDS.
+    '''
+
+    def __init__(self, project_path, project_type, expansion=False, use_cache=True, workers=1, backend='lines'):
+        self.project_path = project_path
+        self.project_type = project_type
+        self.project_files = read_project_files(project_type)
+        self.expansion = expansion
+        self.cache = ProjectCache(project_path, project_type) if use_cache else None
+        self.workers = workers
+        self.backend = backend
+
+    def get_path(self, file_key):
+        return os.path.join(self.project_path, self.project_files[file_key].lstrip("/"))
+
+    def get_jobs(self):
+        families = EXPANSION_FAMILIES if self.expansion else BASE_FAMILIES
+        jobs = []
+        for path, file_families in group_families_by_file(self.project_path, self.project_files, families).items():
+            name = 'constants:' + ','.join(dict.fromkeys(family for family, prefix in file_families))
+            jobs.append(LoadJob(name, 'constants', scan_header, [path], (file_families,)))
+
+        jobs.append(LoadJob('trainer_pics', 'sprites', parse_trainer_pics, [self.get_path("trainer_pics_ptr"), self.get_path("trainer_pics_dir")]))
+        jobs.append(LoadJob('mon_pics', 'sprites', parse_mon_pics, [self.get_path("mon_pics_ptr"), self.get_path("mon_pics_dir")]))
+        if self.uses_showdown_party():
+            # Trainers and their parties come from the same Showdown-format file.
+            jobs.append(LoadJob('trainers', 'trainers', read_showdown_trainers, [self.get_path("trainers_party")]))
+            return jobs
+
+        trainers_parser, parties_indexer = PARSER_BACKENDS[self.backend]
+        jobs.append(LoadJob('trainers', 'trainers', trainers_parser, [self.get_path("trainer_data")]))
+        jobs.append(LoadJob('trainer_parties', 'parties', parties_indexer, [self.get_path("trainer_parties")]))
+        return jobs
+
+    def uses_showdown_party(self):
+        ''' Whether the project keeps its trainers in pokeemerald-expansion's trainers.party. '''
+        return "trainers_party" in self.project_files and os.path.exists(self.get_path("trainers_party"))
+
+    def get_cached(self, job):
+        if self.cache is None:
+            return None
+        return self.cache.get(job.name, job.paths)
+
+    def store(self, job, result, results):
+        results[job.name] = result
+        if self.cache is not None:
+            self.cache.put(job.name, job.paths, result)
+
+    def load(self, progress=None, cancel=None):
+        ''' Run every job and link the results.
+
+        `progress(stage, done, total)` is called as jobs start (serial) or finish (parallel), and `cancel` is
+        an optional threading.Event checked between jobs. A cancelled load raises LoadCancelled and never
+        returns partial data.
+        '''
+        if self.cache is not None:
+            self.cache.load()
+
+        jobs = self.get_jobs()
+        results = {}
+        pending = []
+        for job in jobs:
+            result = self.get_cached(job)
+            if result is not None:
+                results[job.name] = result
+            else:
+                pending.append(job)
+
+        if self.workers > 1 and len(pending) > 1:
+            pending = self.run_parallel(pending, results, len(jobs), progress, cancel)
+        self.run_serial(pending, results, len(jobs), progress, cancel)
+
+        if cancel is not None and cancel.is_set():
+            raise LoadCancelled()
+        if progress is not None:
+            progress('linking', len(jobs), len(jobs))
+
+        # Written before linking, which modifies the parsed trainers.
+        if self.cache is not None:
+            self.cache.save()
+
+        return self.link(results)
+
+    def run_serial(self, jobs, results, total, progress, cancel):
+        for job in jobs:
+            if cancel is not None and cancel.is_set():
+                raise LoadCancelled()
+            if progress is not None:
+                progress(job.stage, len(results), total)
+            self.store(job, job.run(), results)
+
+    def run_parallel(self, jobs, results, total, progress, cancel):
+        ''' Run the jobs in a process pool and return those left for the serial path if the pool breaks. '''
+        # Imported here so serial loads (and the command line tool) don't pay for multiprocessing at startup.
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+        from concurrent.futures.process import BrokenProcessPool
+
+        # Spawned workers don't inherit the Tk thread state that a fork would copy.
+        context = multiprocessing.get_context("spawn")
+        try:
+            executor = ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)), mp_context=context)
+        except (OSError, NotImplementedError):
+            return jobs
+
+        remaining = list(jobs)
+        try:
+            futures = {executor.submit(run_load_job, job): job for job in jobs}
+            not_done = set(futures)
+            while not_done:
+                done, not_done = wait(not_done, timeout=0.1, return_when=FIRST_COMPLETED)
+                if cancel is not None and cancel.is_set():
+                    raise LoadCancelled()
+                for future in done:
+                    job = futures[future]
+                    self.store(job, future.result(), results)
+                    remaining.remove(job)
+                    if progress is not None:
+                        progress(job.stage, len(results), total)
+        except (BrokenProcessPool, OSError):
+            return remaining
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return []
+
+    def link(self, results):
+        ''' Merge the job results into a ProjectData, resolving AI flags and attaching each party reference. '''
+        project_data = ProjectData()
+        project_data.expansion = self.expansion
+        project_data.showdown = self.uses_showdown_party()
+        if project_data.showdown:
+            project_data.source_paths = {"trainers_party": self.get_path("trainers_party")}
+        else:
+            project_data.source_paths = {key: self.get_path(key) for key in ("trainer_data", "trainer_parties")}
+
+        constants = ProjectConstants()
+        for name, result in results.items():
+            if name.startswith('constants:'):
+                constants.families.update(result)
+        project_data.constants = constants
+        project_data.symbols = SymbolTable.from_constants(constants)
+
+        for flag in constants.get('ai_flags'):
+            project_data.ai_flags.add_flag(flag)
+
+        project_data.trainer_pics = results['trainer_pics']
+        project_data.mon_pics = results['mon_pics']
+
+        parties = results.get('trainer_parties', {})
+        for trainer in results['trainers']:
+            project_data.ai_flags.resolve(trainer)
+            if trainer.party_name in parties:
+                trainer.set_party_ref(parties[trainer.party_name])
+            project_data.trainers.append(trainer)
+
+        return project_data
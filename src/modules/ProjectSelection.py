@@ -2,13 +2,7 @@
 
 import tkinter as tk
 from tkinter import ttk
-
-PROJECT_TYPES = [
-    "pokeemerald",
-    "pokeruby",
-    "pokefirered",
-    "pokeemerald-expansion"
-]
+from modules.ProjectLoader import PROJECT_TYPES
 
 class ProjectSelectionDialog:
     '''Dialog modal para seleccionar el tipo de proyecto.
@@ -1,5 +1,12 @@
-from modules.classes import Trainer, Pokemon
+from modules.classes import Trainer, Pokemon, DEFAULT_ITEMS, DEFAULT_MOVES
+from modules.LoadTrainerData import SHOWDOWN_STATS, load_all_parties, locate_entries, read_showdown_names, locate_showdown_entries
+from modules.ProjectCache import hash_file
+import bisect
+import hashlib
+import itertools
 import os
+import stat
+import tempfile
 
 INITIAL_FILE_CONTENT = \
 {
@@ -55,15 +62,117 @@ INITIAL_FILE_CONTENT = \
         '    },\n'
 }
 
-CUSTOM_MOVES = 0b01
-CUSTOM_ITEMS = 0b10
+# Party struct of each party type macro: (struct name, writes .heldItem, writes .moves).
+PARTY_STRUCTS = {
+    'NO_ITEM_DEFAULT_MOVES': ('TrainerMonNoItemDefaultMoves', False, False),
+    'NO_ITEM_CUSTOM_MOVES':  ('TrainerMonNoItemCustomMoves', False, True),
+    'ITEM_DEFAULT_MOVES':    ('TrainerMonItemDefaultMoves', True, False),
+    'ITEM_CUSTOM_MOVES':     ('TrainerMonItemCustomMoves', True, True),
+}
+
+# One gTrainers entry. It is the same for every project type; only INITIAL_FILE_CONTENT differs.
+TRAINER_TEMPLATE = \
+    '\n' + \
+    '    [%s] =\n' + \
+    '    {\n' + \
+    '        .trainerClass = %s,\n' + \
+    '        .encounterMusic_gender = %s%s,\n' + \
+    '        .trainerPic = %s,\n' + \
+    '        .trainerName = _("%s"),\n' + \
+    '        .items = %s,\n' + \
+    '        .doubleBattle = %s,\n' + \
+    '        .aiFlags = %s,\n' + \
+    '        .party = %s(%s),\n' + \
+    '    },\n'
+
+# Start of a party member; the optional fields and the closing brace follow.
+MON_TEMPLATE = \
+    '    {\n' + \
+    '    .iv = %d,\n' + \
+    '    .lvl = %d,\n' + \
+    '    .species = %s,'
+
+
+class AtomicFile():
+    ''' Writes a file through a temporary file next to it, and only replaces the file if the content changed.
+
+    Leaving the file alone when nothing changed keeps its mtime, so make doesn't rebuild everything that
+    includes it. A changed file is fsynced and renamed over the old one, so a crash never leaves half a header.
+    Use as a context manager; `changed` tells afterwards whether the file was replaced.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.changed = False
+
+
+    def __enter__(self):
+        directory, name = os.path.split(os.path.abspath(self.path))
+        descriptor, self.temp_path = tempfile.mkstemp(dir=directory, prefix='.' + name + '.', suffix='.tmp')
+        self.file = os.fdopen(descriptor, 'wb')
+        self.digest = hashlib.sha1()
+        return self
+
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.digest.update(data)
+        self.file.write(data)
+
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None and not self.same_content(self.file.tell()):
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.copy_mode()
+                os.replace(self.temp_path, self.path)
+                self.changed = True
+        finally:
+            self.file.close()
+            if not self.changed:
+                os.remove(self.temp_path)
+
+
+    def same_content(self, size):
+        ''' Whether the file on disk already holds what was written. Only files of the same size get hashed. '''
+        try:
+            if os.stat(self.path).st_size != size:
+                return False
+            return hash_file(self.path) == self.digest.hexdigest()
+        except FileNotFoundError:
+            return False
+
+
+    def copy_mode(self):
+        ''' Give the temporary file the permissions of the file it replaces, or the usual ones for a new file. '''
+        try:
+            mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(self.temp_path, mode)
 
 
 class TrainerDataFile():
-    def __init__(self, trainers, project_type):
+    ''' Writer for trainers.h and trainer_parties.h.
+
+    Both files are rendered as lists of chunks, one per trainer, and written in one go, so the cost grows
+    linearly with the number of trainers. The separators after the last trainer and party are trimmed from
+    the last chunk instead of the whole text.
+    '''
+    def __init__(self, trainers, project_type, ai_flags):
         self.trainers_h = ''
         self.trainer_parties_h = ''
         self.project_type = project_type
+        self.ai_flags = ai_flags # AiFlagList the trainers' masks refer to
         self.data = trainers[1:] # Avoid TRAINER_NONE
 
 
@@ -71,128 +180,485 @@ class TrainerDataFile():
         self.trainers_h = INITIAL_FILE_CONTENT[self.project_type]
 
 
-    def create_files(self, output_path):
+    def render(self):
+        ''' Return the chunks of trainers.h and of trainer_parties.h. '''
+        trainers_chunks = [self.trainers_h]
+        parties_chunks = [self.trainer_parties_h] if self.trainer_parties_h else []
         for trainer in self.data:
             party_type = self.get_trainer_party_type(trainer)
-            self.trainers_h += self.write_trainer(trainer, party_type)
-            self.trainer_parties_h += self.write_parties(trainer, party_type)
-        
-        self.trainers_h = self.trainers_h[:-2]
-        self.trainers_h += '\n};\n'
+            trainers_chunks.append(self.write_trainer(trainer, party_type))
+            parties_chunks.append(self.write_parties(trainer, party_type))
 
-        self.trainer_parties_h = self.trainer_parties_h[:-1]
+        # No comma after the last trainer, and a single newline after the last party.
+        trainers_chunks[-1] = trainers_chunks[-1][:-2]
+        trainers_chunks.append('\n};\n')
+        if parties_chunks:
+            parties_chunks[-1] = parties_chunks[-1][:-1]
+        return trainers_chunks, parties_chunks
 
-        with open (os.path.join(output_path, 'trainers.h'), 'wt') as trainers_h:
-            trainers_h.write(self.trainers_h)
-        
-        with open (os.path.join(output_path, 'trainer_parties.h'), 'wt') as trainer_parties_h:
-            trainer_parties_h.write(self.trainer_parties_h)
 
+    def create_files(self, output_path):
+        return self.write_files(os.path.join(output_path, 'trainers.h'), os.path.join(output_path, 'trainer_parties.h'))
 
-    def get_trainer_party_type(self, trainer):
-        party_type_byte = 0
-        party_type = 'NO_ITEM_DEFAULT_MOVES'
 
-        held_item_counter = 0
-        for mon in trainer.pokemon:
-            if mon.held_item != 'ITEM_NONE':
-                held_item_counter += 1
-            
-        if held_item_counter != 0:
-            party_type_byte += CUSTOM_ITEMS
-        
-        custom_move_counter = 0
+    def write_files(self, trainers_path, parties_path):
+        ''' Write both files, skipping those whose content is unchanged. Returns the paths that changed. '''
+        trainers_chunks, parties_chunks = self.render()
+
+        with AtomicFile(trainers_path) as trainers_h:
+            trainers_h.writelines(trainers_chunks)
+
+        with AtomicFile(parties_path) as trainer_parties_h:
+            trainer_parties_h.writelines(parties_chunks)
+
+        return [f.path for f in (trainers_h, trainer_parties_h) if f.changed]
+
+
+    def get_trainer_party_type(self, trainer):
+        custom_items = False
+        custom_moves = False
         for mon in trainer.pokemon:
-            if mon.moves != ["MOVE_NONE", "MOVE_NONE", "MOVE_NONE", "MOVE_NONE"]:
-                custom_move_counter += 1
-        
-        if custom_move_counter != 0:
-            party_type_byte += CUSTOM_MOVES
-        
-        if party_type_byte == CUSTOM_MOVES:
-            party_type = 'NO_ITEM_CUSTOM_MOVES'
-        elif party_type_byte == CUSTOM_ITEMS:
-            party_type = 'ITEM_DEFAULT_MOVES'
-        elif party_type_byte == (CUSTOM_ITEMS + CUSTOM_MOVES):
-            party_type = 'ITEM_CUSTOM_MOVES'
-        
-        return party_type
+            custom_items = custom_items or mon.held_item != 'ITEM_NONE'
+            custom_moves = custom_moves or mon.moves != DEFAULT_MOVES
+
+        if custom_items and custom_moves:
+            return 'ITEM_CUSTOM_MOVES'
+        if custom_items:
+            return 'ITEM_DEFAULT_MOVES'
+        if custom_moves:
+            return 'NO_ITEM_CUSTOM_MOVES'
+        return 'NO_ITEM_DEFAULT_MOVES'
 
 
     def write_trainer(self, trainer, party_type='NO_ITEM_DEFAULT_MOVES'):
         # Trainers.h
-        if trainer.items != ['ITEM_NONE', 'ITEM_NONE', 'ITEM_NONE', 'ITEM_NONE']:
-            item_list = '{' + str(trainer.items).replace("'", "")[1:-1] + '}'
+        if trainer.items != DEFAULT_ITEMS:
+            item_list = '{' + ', '.join(trainer.items) + '}'
         else:
             item_list = '{}'
-        
-        if len(trainer.ai_flags) == 0:
+
+        if trainer.ai_flag_mask == 0:
             flag_list = '0'
         else:
-            flag_list = str(trainer.ai_flags).replace("'", "")[1:-1].replace(', ', ' | ')
-
-        double_battle = 'FALSE'
-        if trainer.double_battle:
-            double_battle = 'TRUE'
-
-        gender_flag = ''
-        if trainer.gender == 'FEMALE':
-            gender_flag = 'F_TRAINER_FEMALE | '
-        
-        trainer_data = '\n' + \
-        '    [' + trainer.id + '] =\n' + \
-        '    {\n' + \
-        '        .trainerClass = ' + trainer.trainer_class + ',\n' + \
-        '        .encounterMusic_gender = ' + gender_flag + trainer.encounter_music + ',\n' + \
-        '        .trainerPic = ' + trainer.trainer_pic + ',\n' + \
-        '        .trainerName = _("' + trainer.name + '"),\n' + \
-        '        .items = ' + item_list + ',\n' + \
-        '        .doubleBattle = ' + double_battle + ',\n' + \
-        '        .aiFlags = ' + flag_list + ',\n' + \
-        '        .party = ' + party_type + '(' + trainer.party_name + '),\n' + \
-        '    },\n'
-        
-        return trainer_data
+            flag_list = ' | '.join(self.ai_flags.names_of(trainer.ai_flag_mask))
+
+        return TRAINER_TEMPLATE % (
+            trainer.id,
+            trainer.trainer_class,
+            'F_TRAINER_FEMALE | ' if trainer.gender == 'FEMALE' else '', trainer.encounter_music,
+            trainer.trainer_pic,
+            trainer.name,
+            item_list,
+            'TRUE' if trainer.double_battle else 'FALSE',
+            flag_list,
+            party_type, trainer.party_name)
 
 
     def write_parties(self, trainer, party_type='NO_ITEM_DEFAULT_MOVES'):
-        party_struct_name = 'TrainerMonNoItemDefaultMoves'
-        if party_type == 'NO_ITEM_CUSTOM_MOVES':
-            party_struct_name = 'TrainerMonNoItemCustomMoves'
-        elif party_type == 'ITEM_DEFAULT_MOVES':
-            party_struct_name = 'TrainerMonItemDefaultMoves'
-        elif party_type == 'ITEM_CUSTOM_MOVES':
-            party_struct_name = 'TrainerMonItemCustomMoves'
-        party_data = \
-        'static const struct ' + party_struct_name + ' ' + trainer.party_name + '[] = {\n'
+        party_struct_name, held_item, custom_moves = PARTY_STRUCTS[party_type]
+        mons = []
         for mon in trainer.pokemon:
-            party_data += \
-            '    {\n' + \
-            '    .iv = ' + str(mon.iv) + ',\n' + \
-            '    .lvl = ' + str(mon.level) + ',\n' + \
-            '    .species = ' + mon.species + ','
-            if party_type in ['ITEM_DEFAULT_MOVES', 'ITEM_CUSTOM_MOVES']:
-                party_data += \
-                '\n' + \
-                '    .heldItem = ' + mon.held_item
-
-            if party_type in ['NO_ITEM_CUSTOM_MOVES', 'ITEM_CUSTOM_MOVES']:
-                move_list = '{' + str(mon.moves).replace("'", "")[1:-1] + '}'
-                if party_type == 'ITEM_CUSTOM_MOVES':
-                    party_data += ','
-                party_data += \
-                '\n' + \
-                '    .moves = ' + move_list
-            party_data += \
-            '\n    },\n'
-        
-        party_data = party_data[:-2]
-        party_data += '\n};\n\n'
-
-        return party_data
-        
-
-if __name__ == "__main__":
-    file = TrainerDataFile(None, 'pokefirered')
-    file.init_file()
-    print(file.trainers_h)
\ No newline at end of file
+            parts = [MON_TEMPLATE % (mon.iv, mon.level, mon.species)]
+            if held_item:
+                parts.append('\n    .heldItem = ' + mon.held_item)
+            if custom_moves:
+                if held_item:
+                    parts.append(',')
+                parts.append('\n    .moves = {' + ', '.join(mon.moves) + '}')
+            parts.append('\n    }')
+            mons.append(''.join(parts))
+
+        # An empty party keeps the old output, which also lost the opening brace.
+        opening = ' = {\n' if mons else ' = '
+        return 'static const struct ' + party_struct_name + ' ' + trainer.party_name + '[]' + opening + \
+            ',\n'.join(mons) + '\n};\n\n'
+
+
+class SpliceError(Exception):
+    ''' Raised when the source files changed so much that the recorded spans no longer point at their entries. '''
+
+
+def splice(content, replacements):
+    ''' Return `content` with every (start, end, new bytes) replacement applied. They must be sorted and not overlap. '''
+    chunks = []
+    position = 0
+    for start, end, text in replacements:
+        chunks.append(content[position:start])
+        chunks.append(text)
+        position = end
+    chunks.append(content[position:])
+    return b''.join(chunks)
+
+
+def span_mover(replacements):
+    ''' Return a function mapping a (start, end) span of the content before splice() to the content after it.
+    Spans must either be one of the replaced spans or not overlap any of them. '''
+    starts = [start for start, end, text in replacements]
+    shifts = [0] + list(itertools.accumulate(len(text) - (end - start) for start, end, text in replacements))
+
+    def move(start, end):
+        before = bisect.bisect_left(starts, start) # Replacements entirely before the span
+        if before < len(starts) and starts[before] == start:
+            start += shifts[before]
+            return start, start + len(replacements[before][2])
+        return start + shifts[before], end + shifts[before]
+    return move
+
+
+def is_entry(original, start, end):
+    ''' Whether a span still holds a whole entry: it starts at the `start` line and ends with `end` (or `end,`). '''
+    body = original.strip().rstrip(b',')
+    return body.startswith(start) and body.endswith(end)
+
+
+def fit_replacement(original, text):
+    ''' Encode a rendered entry to take the place of `original`, keeping the original's trailing comma (or lack
+    of one), the whitespace after it and its line endings. '''
+    body = original.rstrip()
+    new = text.lstrip('\n').rstrip().encode()
+    if new.endswith(b',') and not body.endswith(b','):
+        new = new[:-1]
+    elif body.endswith(b',') and not new.endswith(b','):
+        new += b','
+    if b'\r\n' in original:
+        new = new.replace(b'\n', b'\r\n')
+    return new + original[len(body):]
+
+
+class TrainerDataSplice():
+    ''' Save by rewriting only the dirty trainers and their parties inside the files they were parsed from.
+
+    Everything else, comments and `#if` blocks included, is copied byte for byte, so the cost of a save depends
+    on the edits instead of the project size and the diff shows just the edited entries.
+    '''
+    def __init__(self, project_data, project_type):
+        self.project_data = project_data
+        self.renderer = TrainerDataFile(project_data.trainers, project_type, project_data.ai_flags)
+        self.trainers_path = project_data.source_paths.get("trainer_data")
+        self.parties_path = project_data.source_paths.get("trainer_parties")
+
+
+    def dirty_trainers(self):
+        return [trainer for trainer in self.project_data.trainers if trainer.dirty]
+
+
+    def can_splice(self):
+        ''' Whether every dirty trainer has both of its entries located in the source files. '''
+        if not self.trainers_path or not self.parties_path:
+            return False
+        if not (os.path.exists(self.trainers_path) and os.path.exists(self.parties_path)):
+            return False
+        for trainer in self.dirty_trainers():
+            if trainer.span is None or trainer.party_ref is None or trainer.party_ref.path != self.parties_path:
+                return False
+        return True
+
+
+    def replacements(self, trainers_content, parties_content):
+        ''' Return the sorted replacements of both files. Raises SpliceError if a span lost its entry. '''
+        trainers_replacements = []
+        parties_replacements = {}
+        for trainer in self.dirty_trainers():
+            start, end = trainer.span
+            original = trainers_content[start:end]
+            if not is_entry(original, ('[' + trainer.id + ']').encode(), b'}'):
+                raise SpliceError(trainer.id + " moved in " + self.trainers_path)
+            party_type = self.renderer.get_trainer_party_type(trainer)
+            trainers_replacements.append((start, end, fit_replacement(original, self.renderer.write_trainer(trainer, party_type))))
+
+            party_ref = trainer.party_ref
+            original = parties_content[party_ref.start:party_ref.end]
+            first_line = original.split(b'\n', 1)[0]
+            if not (is_entry(original, b'static const struct', b'};') and (party_ref.symbol + '[]').encode() in first_line.split()):
+                raise SpliceError(party_ref.symbol + " moved in " + self.parties_path)
+            # Keyed by position: trainers sharing a party symbol write it once.
+            parties_replacements[party_ref.start] = (party_ref.start, party_ref.end,
+                fit_replacement(original, self.renderer.write_parties(trainer, party_type)))
+
+        return sorted(trainers_replacements), sorted(parties_replacements.values())
+
+
+    def create_files(self, output_path):
+        return self.write_files(os.path.join(output_path, 'trainers.h'), os.path.join(output_path, 'trainer_parties.h'))
+
+
+    def write_files(self, trainers_path, parties_path):
+        ''' Write the spliced files, skipping those whose content is unchanged. Returns the paths that changed.
+
+        When they are written over the source files, the spans of every trainer are moved to match and the
+        dirty flags are cleared; otherwise the edits stay dirty for the next save.
+        '''
+        in_place = is_same_file(trainers_path, self.trainers_path) and is_same_file(parties_path, self.parties_path)
+        with open(self.trainers_path, "rb") as f:
+            trainers_content = f.read()
+        with open(self.parties_path, "rb") as f:
+            parties_content = f.read()
+        trainers_replacements, parties_replacements = self.replacements(trainers_content, parties_content)
+
+        with AtomicFile(trainers_path) as trainers_h:
+            trainers_h.write(splice(trainers_content, trainers_replacements))
+
+        with AtomicFile(parties_path) as trainer_parties_h:
+            trainer_parties_h.write(splice(parties_content, parties_replacements))
+
+        if in_place:
+            self.move_spans(trainers_replacements, parties_replacements)
+        return [f.path for f in (trainers_h, trainer_parties_h) if f.changed]
+
+
+    def move_spans(self, trainers_replacements, parties_replacements):
+        move_trainer = span_mover(trainers_replacements)
+        move_party = span_mover(parties_replacements)
+        moved_refs = set() # Trainers sharing a party share its PartyRef
+        for trainer in self.project_data.trainers:
+            trainer.dirty = False
+            if trainer.span is not None:
+                trainer.span = move_trainer(*trainer.span)
+            party_ref = trainer.party_ref
+            if party_ref is not None and party_ref.path == self.parties_path and id(party_ref) not in moved_refs:
+                moved_refs.add(id(party_ref))
+                party_ref.start, party_ref.end = move_party(party_ref.start, party_ref.end)
+
+
+def is_same_file(path, other_path):
+    return other_path is not None and os.path.exists(path) and os.path.exists(other_path) and os.path.samefile(path, other_path)
+
+
+def save_trainer_files(project_data, project_type, paths):
+    ''' Save the trainers of a project to `paths`, a project_files.json style dict: 'trainers_party' for
+    showdown projects, 'trainer_data' and 'trainer_parties' otherwise. Returns the paths whose content changed.
+
+    The C headers are spliced when every edited trainer can be located in the files it was parsed from, and
+    regenerated otherwise. Unchanged files are never rewritten.
+    '''
+    if project_data.showdown:
+        return save_showdown_file(project_data, paths['trainers_party'])
+
+    trainers_path, parties_path = paths['trainer_data'], paths['trainer_parties']
+    splice_obj = TrainerDataSplice(project_data, project_type)
+    if splice_obj.can_splice():
+        try:
+            return splice_obj.write_files(trainers_path, parties_path)
+        except SpliceError:
+            pass # The source files were edited outside the editor, write everything instead
+
+    in_place = is_same_file(trainers_path, splice_obj.trainers_path) and is_same_file(parties_path, splice_obj.parties_path)
+    load_all_parties(project_data.trainers)
+    save_obj = TrainerDataFile(project_data.trainers, project_type, project_data.ai_flags)
+    save_obj.init_file()
+    changed = save_obj.write_files(trainers_path, parties_path)
+    if in_place:
+        # Every entry may have moved, so look them up again for the next splice.
+        locate_entries(project_data.trainers, trainers_path, parties_path)
+    return changed
+
+
+def save_showdown_file(project_data, path):
+    ''' save_trainer_files for trainers.party: splice the edited blocks when they can all be located, and
+    regenerate the file otherwise. '''
+    splice_obj = ShowdownPartySplice(project_data)
+    if splice_obj.can_splice():
+        try:
+            return splice_obj.write_file(path)
+        except SpliceError:
+            pass # The source file was edited outside the editor, write everything instead
+
+    source_path = splice_obj.path
+    names = read_showdown_names(source_path) if source_path and os.path.exists(source_path) else None
+    changed = ShowdownPartyFile(project_data.trainers, project_data.ai_flags, names).write_file(path)
+    if is_same_file(path, source_path):
+        locate_showdown_entries(project_data.trainers, path)
+    return changed
+
+
+def constant_to_showdown(constant, prefix):
+    ''' Turn a constant such as SPECIES_ZIGZAGOON back into a trainers.party name, "Zigzagoon".
+
+    Punctuation dropped by the parser can't be restored ("Mr Mime", "U Turn"), so writers look the name up
+    in the names read from the file first.
+    '''
+    return ' '.join(word.capitalize() for word in constant[len(prefix):].split('_'))
+
+
+def block_comments(block):
+    ''' Comment lines of a trainers.party block, keyed by the index of the Pokémon they come before, or -1 for
+    those among the trainer fields. '''
+    comments = {}
+    in_fields = True
+    after_blank = False
+    mon_count = 0
+    in_comment = False
+    for line in block.splitlines()[1:]:
+        stripped = line.strip()
+        if in_comment or stripped.startswith('/*'):
+            in_comment = '*/' not in stripped
+            comments.setdefault(-1 if in_fields else mon_count, []).append(line.rstrip())
+        elif stripped == '':
+            in_fields = False
+            after_blank = True
+        elif after_blank:
+            mon_count += 1
+            after_blank = False
+    return comments
+
+
+class ShowdownPartyFile():
+    ''' Writer for pokeemerald-expansion's trainers.party.
+
+    `trainers` can be any iterable, including the generator from LoadTrainerData.read_showdown_trainers;
+    each trainer is written as soon as it is produced, so nothing else is kept in memory. `names` maps
+    constants to the names to write for them, as returned by read_showdown_names.
+    '''
+    def __init__(self, trainers, ai_flags, names=None):
+        self.data = trainers
+        self.ai_flags = ai_flags # AiFlagList the trainers' masks refer to
+        self.names = names or {}
+
+
+    def create_file(self, output_path, file_name='trainers.party'):
+        return self.write_file(os.path.join(output_path, file_name))
+
+
+    def write_file(self, path):
+        ''' Write the file unless its content is unchanged. Returns [path] if it changed, else []. '''
+        with AtomicFile(path) as trainers_party:
+            for trainer in self.data:
+                trainers_party.write(self.write_trainer(trainer))
+        return [path] if trainers_party.changed else []
+
+
+    def name(self, constant, prefix):
+        name = self.names.get(constant)
+        return name if name is not None else constant_to_showdown(constant, prefix)
+
+
+    def write_trainer(self, trainer, comments=None):
+        ''' Render a trainer's block. `comments` are the block_comments to put back in it. '''
+        comments = comments or {}
+        lines = [
+            '=== ' + trainer.id + ' ===',
+            'Name:' + (' ' + trainer.name if trainer.name else ''),
+            'Class: ' + self.name(trainer.trainer_class, 'TRAINER_CLASS_'),
+            'Pic: ' + self.name(trainer.trainer_pic, 'TRAINER_PIC_'),
+            'Gender: ' + trainer.gender.capitalize(),
+            'Music: ' + self.name(trainer.encounter_music, 'TRAINER_ENCOUNTER_MUSIC_'),
+        ]
+        items = [item for item in trainer.items if item != 'ITEM_NONE']
+        if items:
+            lines.append('Items: ' + ' / '.join(self.name(item, 'ITEM_') for item in items))
+        lines.append('Double Battle: ' + ('Yes' if trainer.double_battle else 'No'))
+        if trainer.ai_flag_mask:
+            flags = self.ai_flags.names_of(trainer.ai_flag_mask)
+            lines.append('AI: ' + ' / '.join(self.name(flag, flag[:flag.index('_', 3) + 1]) for flag in flags))
+        for field, value in trainer.extra.items():
+            lines.append(field + ': ' + value)
+        lines += comments.get(-1, [])
+        lines.append('')
+
+        party = trainer.pokemon
+        for index, mon in enumerate(party):
+            lines += comments.get(index, [])
+            lines += self.write_mon(mon)
+            lines.append('')
+        for index in sorted(comments):
+            if index >= len(party):
+                lines[-1:-1] = comments[index]
+
+        # Every block ends with a blank line, which also separates it from the next trainer.
+        return '\n'.join(lines) + '\n'
+
+
+    def write_mon(self, mon):
+        header = self.name(mon.species, 'SPECIES_')
+        if 'Nickname' in mon.extra:
+            header = mon.extra['Nickname'] + ' (' + header + ')'
+        if 'Gender' in mon.extra:
+            header += ' (' + mon.extra['Gender'] + ')'
+        if mon.held_item != 'ITEM_NONE':
+            header += ' @ ' + self.name(mon.held_item, 'ITEM_')
+
+        lines = [header, 'Level: ' + str(mon.level)]
+        if mon.ivs:
+            lines.append('IVs: ' + self.write_stats(mon.ivs))
+        if mon.evs:
+            lines.append('EVs: ' + self.write_stats(mon.evs))
+        if mon.nature is not None:
+            lines.append('Nature: ' + self.name(mon.nature, 'NATURE_'))
+        if mon.ability is not None and mon.ability != 'ABILITY_NONE':
+            lines.append('Ability: ' + self.name(mon.ability, 'ABILITY_'))
+        if mon.tera_type is not None:
+            lines.append('Tera Type: ' + self.name(mon.tera_type, 'TYPE_'))
+        for field, value in mon.extra.items():
+            if field not in ('Nickname', 'Gender'):
+                lines.append(field + ': ' + value)
+        for move in mon.moves:
+            if move != 'MOVE_NONE':
+                lines.append('- ' + self.name(move, 'MOVE_'))
+        return lines
+
+
+    def write_stats(self, stats):
+        return ' / '.join(str(stats[key]) + ' ' + name for name, key in SHOWDOWN_STATS.items() if key in stats)
+
+
+class ShowdownPartySplice():
+    ''' Save a trainers.party by rewriting only the blocks of dirty trainers, like TrainerDataSplice does for
+    the C headers. Comments, blank lines and untouched blocks are copied byte for byte. '''
+    def __init__(self, project_data):
+        self.project_data = project_data
+        self.path = project_data.source_paths.get("trainers_party")
+
+
+    def dirty_trainers(self):
+        return [trainer for trainer in self.project_data.trainers if trainer.dirty]
+
+
+    def can_splice(self):
+        if not self.path or not os.path.exists(self.path):
+            return False
+        return all(trainer.span is not None for trainer in self.dirty_trainers())
+
+
+    def replacements(self, content):
+        ''' Return the sorted replacements of the file. Raises SpliceError if a span lost its block. '''
+        dirty = self.dirty_trainers()
+        if not dirty:
+            return []
+        renderer = ShowdownPartyFile(dirty, self.project_data.ai_flags, read_showdown_names(self.path))
+        replacements = []
+        for trainer in dirty:
+            start, end = trainer.span
+            original = content[start:end]
+            if original.split(b'\n', 1)[0].strip() != ('=== ' + trainer.id + ' ===').encode():
+                raise SpliceError(trainer.id + " moved in " + self.path)
+            block = renderer.write_trainer(trainer, block_comments(original.decode()))
+            new = block.rstrip('\n').encode()
+            if b'\r\n' in original:
+                new = new.replace(b'\n', b'\r\n')
+            replacements.append((start, end, new + original[len(original.rstrip(b'\r\n')):]))
+        return sorted(replacements)
+
+
+    def create_file(self, output_path):
+        return self.write_file(os.path.join(output_path, 'trainers.party'))
+
+
+    def write_file(self, path):
+        ''' Write the spliced file unless its content is unchanged. Returns [path] if it changed, else [].
+
+        Written over the source file, the spans are moved to match and the dirty flags are cleared.
+        '''
+        with open(self.path, "rb") as f:
+            content = f.read()
+        replacements = self.replacements(content)
+
+        with AtomicFile(path) as trainers_party:
+            trainers_party.write(splice(content, replacements))
+
+        if is_same_file(path, self.path):
+            move = span_mover(replacements)
+            for trainer in self.project_data.trainers:
+                trainer.dirty = False
+                if trainer.span is not None:
+                    trainer.span = move(*trainer.span)
+        return [path] if trainers_party.changed else []
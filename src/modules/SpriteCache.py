@@ -0,0 +1,162 @@
+#! /usr/bin/env python3
+
+import base64
+import queue
+import threading
+from collections import OrderedDict
+
+# Default memory cap of the decoded sprites. A 64x64 sprite takes about 16 KB, so this holds a couple of thousand.
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# How often the main loop turns files read by the prefetcher into images, in milliseconds.
+PREFETCH_POLL_MS = 30
+# Images decoded per poll, so a long prefetch never blocks the UI for more than a moment.
+PREFETCH_DECODES_PER_POLL = 8
+
+# Size charged for a path remembered as missing or undecodable, so those entries are evicted like the others.
+MISSING_ENTRY_BYTES = 256
+
+
+def decode_photo(master, data):
+    ''' Decode PNG/GIF file contents into a Tk photo image. Returns (image, estimated bytes). '''
+    import tkinter as tk
+    image = tk.PhotoImage(master=master, data=base64.b64encode(data))
+    return image, image.width() * image.height() * 4
+
+
+def copy_into(target, image, width=0, height=0):
+    ''' Show `image` in the photo image `target` that a widget displays, cropped to width x height if given. '''
+    crop_width = min(width, image.width()) if width else image.width()
+    crop_height = min(height, image.height()) if height else image.height()
+    target.tk.call(target, 'copy', image, '-from', 0, 0, crop_width, crop_height, '-shrink')
+
+
+class SpriteCache:
+    ''' Decoded sprites by file path, in an LRU bounded by their estimated memory size.
+
+    Files that don't exist are remembered as None, so a miss doesn't touch the disk again. prefetch() hands
+    paths to a background thread that only loads the files (and converts GBA graphics, see GbaGraphics);
+    images are decoded on the main loop, a few per poll, since Tk objects can't be created from another thread.
+    Requests and reads carry the generation they were made in: clear() starts a new one, so files still being
+    read for a previous project are dropped instead of decoded.
+    '''
+
+    def __init__(self, master, max_bytes=DEFAULT_MAX_BYTES, decode=decode_photo, load=None):
+        self.master = master
+        self.max_bytes = max_bytes
+        self.decode = decode
+        self.load = load if load is not None else read_file # Path -> image file contents or None, thread safe
+        self.entries = OrderedDict() # Path -> (image or None, estimated bytes), least recently used first
+        self.used_bytes = 0
+        self.requests = queue.LifoQueue() # (generation, path) to read, the newest first: the likeliest to be shown
+        self.read = queue.Queue()          # (generation, path, file contents or None) read by the prefetcher
+        self.pending = set()               # Paths requested and not decoded yet
+        self.pending_lock = threading.Lock()
+        self.generation = 0
+        self.thread = None
+        self.pump_scheduled = False
+
+    def clear(self):
+        ''' Drop every sprite and every pending prefetch, e.g. when another project is opened. '''
+        self.entries.clear()
+        self.used_bytes = 0
+        with self.pending_lock:
+            self.generation += 1
+            self.pending.clear()
+            drain(self.requests)
+            drain(self.read)
+
+    def close(self):
+        ''' Drop everything and stop the prefetch thread. '''
+        self.clear()
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def get(self, path):
+        ''' Return the image of a sprite file, None if it doesn't exist or can't be decoded. '''
+        if path is None:
+            return None
+        entry = self.entries.get(path)
+        if entry is not None:
+            self.entries.move_to_end(path)
+            return entry[0]
+        return self.store(path, self.load(path))
+
+    def store(self, path, data):
+        image, size = None, MISSING_ENTRY_BYTES
+        if data is not None:
+            try:
+                image, size = self.decode(self.master, data)
+            except Exception:
+                pass # Not an image Tk can read; remembered as missing
+        self.entries[path] = (image, size)
+        self.entries.move_to_end(path)
+        self.used_bytes += size
+        # The sprite just stored always stays, even if it is bigger than the cap on its own.
+        while self.used_bytes > self.max_bytes and len(self.entries) > 1:
+            old_path, (old_image, old_size) = self.entries.popitem(last=False)
+            self.used_bytes -= old_size
+        return image
+
+    def prefetch(self, paths):
+        ''' Read the given sprite files in the background so a later get() finds them decoded. '''
+        with self.pending_lock:
+            for path in paths:
+                if path is not None and path not in self.entries and path not in self.pending:
+                    self.pending.add(path)
+                    self.requests.put((self.generation, path))
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.prefetch_worker, daemon=True)
+            self.thread.start()
+        self.schedule_pump()
+
+    def prefetch_worker(self):
+        while True:
+            request = self.requests.get()
+            if request is None: # Put by close()
+                return
+            generation, path = request
+            if generation == self.generation:
+                self.read.put((generation, path, self.load(path)))
+
+    def schedule_pump(self):
+        if not self.pump_scheduled:
+            self.pump_scheduled = True
+            self.master.after(PREFETCH_POLL_MS, self.pump)
+
+    def pump(self, limit=PREFETCH_DECODES_PER_POLL):
+        ''' Decode up to `limit` prefetched files, and poll again while some are still pending. '''
+        self.pump_scheduled = False
+        for _ in range(limit):
+            try:
+                generation, path, data = self.read.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation:
+                continue # Read for the project open before the last clear()
+            with self.pending_lock:
+                self.pending.discard(path)
+            if path not in self.entries: # get() may have needed it first
+                self.store(path, data)
+        with self.pending_lock:
+            if self.pending:
+                self.schedule_pump()
+
+
+def drain(items):
+    ''' Empty a queue without blocking. '''
+    while True:
+        try:
+            items.get_nowait()
+        except queue.Empty:
+            return
+
+
+def read_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
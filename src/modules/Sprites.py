@@ -0,0 +1,76 @@
+#! /usr/bin/env python3
+
+import posixpath
+
+# Species whose front pic lives in a form subfolder that the INCBIN path doesn't mention.
+FORM_SUBFOLDERS = {
+    'SPECIES_CASTFORM': 'normal',
+}
+
+
+class SpriteRegistry:
+    ''' Front pic paths indexed by pointer symbol and by trainer pic ID / species. '''
+
+    def __init__(self, subfolders=None):
+        self.pointers = {}   # Pic ID or species -> pointer symbol
+        self.paths = {}      # Pointer symbol -> image path relative to the project
+        self.subfolders = subfolders if subfolders is not None else {}
+
+    def add_pointer(self, key, pointer):
+        self.pointers[key] = pointer
+
+    def add_path(self, pointer, path):
+        self.paths[pointer] = path
+
+    def get_path(self, key):
+        ''' Return the image path for a pic ID or species, None if it is unknown. '''
+        pointer = self.pointers.get(key)
+        if pointer is None:
+            return None
+        path = self.paths.get(pointer, '')
+        subfolder = self.subfolders.get(key)
+        if path and subfolder:
+            head, tail = posixpath.split(path)
+            path = posixpath.join(head, subfolder, tail)
+        return path
+
+    def keys(self):
+        return self.pointers.keys()
+
+
+def read_incbin_paths(path, prefix, registry):
+    ''' Add every `const u32 <prefix>...[] = INCBIN_U32("...");` line of a graphics file to the registry. '''
+    with open(path, "r") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith(prefix):
+                dir_info = stripped[10:-3].replace('[]', '').replace('INCBIN_U32("', '').replace('.4bpp.lz', '.png').split(' = ')
+                registry.add_path(dir_info[0], dir_info[1])
+
+
+def parse_trainer_pics(ptr_path, dir_path):
+    ''' Build the trainer pic registry from the front pic table and the trainer graphics file. '''
+    registry = SpriteRegistry()
+    with open(ptr_path, "r") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith('TRAINER_SPRITE'):
+                entry = stripped[15:-2].split(', ')
+                registry.add_pointer('TRAINER_PIC_' + entry[0], entry[1])
+
+    read_incbin_paths(dir_path, 'const u32 gTrainerFrontPic_', registry)
+    return registry
+
+
+def parse_mon_pics(ptr_path, dir_path):
+    ''' Build the Pokémon front pic registry from the species sprite table and the front pics file. '''
+    registry = SpriteRegistry(FORM_SUBFOLDERS)
+    with open(ptr_path, "r") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith('SPECIES_SPRITE('):
+                entry = stripped[15:-2].replace(' ', '').split(',')
+                registry.add_pointer('SPECIES_' + entry[0], entry[1])
+
+    read_incbin_paths(dir_path, 'const u32 gMonFrontPic_', registry)
+    return registry
@@ -0,0 +1,110 @@
+#! /usr/bin/env python3
+
+from sys import intern
+
+# Constant families that get integer IDs: table family -> ProjectConstants family.
+SYMBOL_FAMILIES = {
+    'species':         'species',
+    'moves':           'moves',
+    'items':           'items',
+    'trainer_classes': 'trainer_classes',
+    'trainer_pics':    'trainer_pics',
+    'encounter_music': 'encounter_music',
+    'ai_flags':        'ai_flags',
+}
+
+
+class SymbolFamily:
+    ''' Dense integer IDs for the symbols of one constant family, in header order.
+
+    Symbols the headers don't define (e.g. used by a trainer but declared in a file the editor doesn't scan)
+    get IDs after the defined ones the first time they are looked up, so every symbol always has an ID.
+    '''
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.add(name)
+        self.defined_count = len(self.names)
+
+    def add(self, name):
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            name = intern(name)
+            symbol_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = symbol_id
+        return symbol_id
+
+    def id(self, name):
+        ''' Return the ID of a symbol, assigning a new one to unknown symbols. '''
+        symbol_id = self.ids.get(name)
+        return symbol_id if symbol_id is not None else self.add(name)
+
+    def lookup(self, name):
+        ''' Return the ID of a symbol, None if it has none. Unlike id(), never assigns one. '''
+        return self.ids.get(name)
+
+    def name(self, symbol_id):
+        return self.names[symbol_id]
+
+    def ids_of(self, names):
+        return [self.id(name) for name in names]
+
+    def names_of(self, symbol_ids):
+        return [self.names[symbol_id] for symbol_id in symbol_ids]
+
+    def is_defined(self, name):
+        ''' Whether the symbol comes from the constants headers, as opposed to only being used by the data. '''
+        symbol_id = self.ids.get(name)
+        return symbol_id is not None and symbol_id < self.defined_count
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __len__(self):
+        return len(self.names)
+
+
+class SymbolTable:
+    ''' Project-wide name <-> ID mapping for every family of SYMBOL_FAMILIES.
+
+    Trainer and Pokemon keep their interned names so the editor and the file writers work with them directly;
+    the IDs are for integer-keyed sets, masks and arrays built over the whole project (PartyColumns,
+    UsageIndex) and for telling defined symbols from the ones only the data uses (cli --validate).
+    Per-object checks such as `mon.moves != DEFAULT_MOVES` stay name comparisons: the names are interned and
+    the defaults are shared tuples, so they compare by identity without a table lookup.
+    '''
+
+    def __init__(self):
+        self.families = {family: SymbolFamily() for family in SYMBOL_FAMILIES}
+
+    @classmethod
+    def from_constants(cls, constants):
+        table = cls()
+        for family, constants_family in SYMBOL_FAMILIES.items():
+            table.families[family] = SymbolFamily(constants.get(constants_family))
+        return table
+
+    def family(self, family):
+        return self.families[family]
+
+    def id(self, family, name):
+        return self.families[family].id(name)
+
+    def name(self, family, symbol_id):
+        return self.families[family].names[symbol_id]
+
+    def trainer_ids(self, trainer):
+        ''' Return the (class, pic, music, item IDs) of a trainer. '''
+        return (self.families['trainer_classes'].id(trainer.trainer_class),
+                self.families['trainer_pics'].id(trainer.trainer_pic),
+                self.families['encounter_music'].id(trainer.encounter_music),
+                tuple(self.families['items'].ids_of(trainer.items)))
+
+    def mon_ids(self, mon):
+        ''' Return the (species, held item, move IDs) of a party member. '''
+        return (self.families['species'].id(mon.species),
+                self.families['items'].id(mon.held_item),
+                tuple(self.families['moves'].ids_of(mon.moves)))
@@ -0,0 +1,52 @@
+#! /usr/bin/env python3
+
+# Length of the indexed n-grams. Longer search words intersect the sets of their n-grams and check the
+# candidates; shorter ones match so many trainers that scanning the texts is just as fast.
+NGRAM_SIZE = 3
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    ''' Every distinct substring of `text` that is `size` characters long. '''
+    return {text[start:start + size] for start in range(len(text) - size + 1)}
+
+
+class NgramIndex:
+    ''' Case-insensitive substring search over short texts (trainer IDs and names) through an n-gram index. '''
+
+    def __init__(self):
+        self.texts = {}   # Key -> indexed lowercase text
+        self.grams = {}   # N-gram -> keys whose text contains it
+
+    def add(self, key, *texts):
+        ''' Index the texts of a key, replacing what it had before. Texts are joined so no match spans two of them. '''
+        self.remove(key)
+        text = '\n'.join(texts).lower()
+        self.texts[key] = text
+        for gram in ngrams(text):
+            self.grams.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+        for gram in ngrams(text):
+            keys = self.grams[gram]
+            keys.discard(key)
+            if not keys:
+                del self.grams[gram]
+
+    def search(self, word):
+        ''' Return the set of keys whose text contains `word`. '''
+        word = word.lower()
+        if len(word) < NGRAM_SIZE:
+            return {key for key, text in self.texts.items() if word in text}
+        if len(word) == NGRAM_SIZE:
+            return set(self.grams.get(word, ()))
+
+        candidates = None
+        for start in range(0, len(word) - NGRAM_SIZE + 1):
+            keys = self.grams.get(word[start:start + NGRAM_SIZE])
+            if not keys:
+                return set()
+            candidates = set(keys) if candidates is None else candidates & keys
+        return {key for key in candidates if word in self.texts[key]}
@@ -0,0 +1,154 @@
+#! /usr/bin/env python3
+
+import re
+from modules.LoadTrainerData import load_all_parties
+from modules.PartyColumns import PartyColumns
+from modules.TrainerSearch import NgramIndex
+
+# Query field -> (index family, symbol prefixes tried on names written without one). Several spellings map to one family.
+QUERY_FIELDS = {
+    'species': ('species', ('SPECIES_',)),
+    'mon':     ('species', ('SPECIES_',)),
+    'move':    ('move', ('MOVE_',)),
+    'held':    ('held_item', ('ITEM_',)),
+    'item':    ('item', ('ITEM_',)),
+    'ai':      ('ai_flag', ('AI_FLAG_', 'AI_SCRIPT_')),
+    'flag':    ('ai_flag', ('AI_FLAG_', 'AI_SCRIPT_')),
+    'pic':     ('pic', ('TRAINER_PIC_',)),
+    'class':   ('class', ('TRAINER_CLASS_',)),
+}
+
+USAGE_FAMILIES = ('species', 'move', 'held_item', 'item', 'ai_flag', 'pic', 'class')
+
+# Symbols every trainer or Pokémon has by default; indexing them would only produce huge useless sets.
+IGNORED_SYMBOLS = {'ITEM_NONE', 'MOVE_NONE'}
+
+LEVEL_TERM_RE = re.compile(r'^level(<=|>=|<|>|=)(\d+)$')
+# Level comparison -> (min_level, max_level) of PartyColumns.select for a bound.
+LEVEL_RANGES = {
+    '<':  lambda bound: (None, bound - 1),
+    '<=': lambda bound: (None, bound),
+    '>':  lambda bound: (bound + 1, None),
+    '>=': lambda bound: (bound, None),
+    '=':  lambda bound: (bound, bound),
+}
+
+
+class QueryError(Exception):
+    ''' Raised for a query term that can't be understood. '''
+
+
+class UsageIndex:
+    ''' Inverted indexes from species, moves, held items, trainer items, AI flags, pics and classes to the
+    indexes (in ProjectData.trainers) of the trainers using them, plus the query language of the find panel.
+
+    A query is a list of space separated terms, all of which must match:
+        species:GYARADOS  move:HYPER_BEAM  held:LEFTOVERS  item:FULL_RESTORE  ai:CHECK_BAD_MOVE
+        pic:HIKER  class:HIKER   (the symbol prefix is optional)
+        level>40  level<=10  level=50   (any party member)
+        double  single
+        anything else is searched for in the trainer IDs and names, through an n-gram index
+    '''
+
+    def __init__(self, project_data):
+        self.project_data = project_data
+        self.build()
+
+    def build(self):
+        ''' Index the trainer IDs and names. The symbol indexes need the parties, so they wait for the first
+        query that uses them: building them here would parse every lazy party on each project open. '''
+        self.index = None # Family -> {symbol: set of trainer indexes}, see symbol_index()
+        self.entries = [] # Per trainer: the (family, symbol) pairs it was indexed under
+        self.text_index = NgramIndex()
+        for trainer_index, trainer in enumerate(self.project_data.trainers):
+            self.text_index.add(trainer_index, trainer.id, trainer.name)
+
+    def symbol_index(self):
+        ''' The symbol indexes, built on first use. Loads the parties that are still lazy, one pass per parties file. '''
+        if self.index is None:
+            load_all_parties(self.project_data.trainers)
+            self.index = {family: {} for family in USAGE_FAMILIES}
+            self.entries = [()] * len(self.project_data.trainers)
+            for trainer_index in range(len(self.project_data.trainers)):
+                self.index_symbols(trainer_index)
+        return self.index
+
+    def trainer_entries(self, trainer):
+        entries = {('class', trainer.trainer_class), ('pic', trainer.trainer_pic)}
+        entries.update(('item', item) for item in trainer.items)
+        entries.update(('ai_flag', flag) for flag in self.project_data.ai_flags.names_of(trainer.ai_flag_mask))
+        for mon in trainer.pokemon:
+            entries.add(('species', mon.species))
+            entries.add(('held_item', mon.held_item))
+            entries.update(('move', move) for move in mon.moves)
+        return [(family, symbol) for family, symbol in entries if symbol not in IGNORED_SYMBOLS]
+
+    def index_symbols(self, trainer_index):
+        entries = self.trainer_entries(self.project_data.trainers[trainer_index])
+        for family, symbol in entries:
+            self.index[family].setdefault(symbol, set()).add(trainer_index)
+        self.entries[trainer_index] = entries
+
+    def update_trainer(self, trainer_index):
+        ''' Reindex one trainer after an edit, touching only the sets of the symbols it used or uses now. '''
+        if self.index is not None:
+            for family, symbol in self.entries[trainer_index]:
+                users = self.index[family][symbol]
+                users.discard(trainer_index)
+                if not users:
+                    del self.index[family][symbol]
+            self.index_symbols(trainer_index)
+        trainer = self.project_data.trainers[trainer_index]
+        self.text_index.add(trainer_index, trainer.id, trainer.name)
+
+    def party_columns(self):
+        ''' The project's PartyColumns, built by the first level query. The editor keeps it in sync afterwards. '''
+        if self.project_data.party_columns is None:
+            load_all_parties(self.project_data.trainers)
+            self.project_data.party_columns = PartyColumns(self.project_data)
+        return self.project_data.party_columns
+
+    def users(self, family, symbol):
+        return self.symbol_index()[family].get(symbol, set())
+
+    def symbols(self, family):
+        return self.symbol_index()[family].keys()
+
+    def query(self, text):
+        ''' Return the sorted indexes of the trainers matching every term of the query. Raises QueryError. '''
+        result = None
+        for term in text.split():
+            matches = self.match_term(term)
+            result = matches if result is None else result & matches
+            if not result:
+                break
+        if result is None:
+            return list(range(len(self.project_data.trainers)))
+        return sorted(result)
+
+    def match_term(self, term):
+        field, separator, value = term.partition(':')
+        if separator:
+            if field.lower() not in QUERY_FIELDS:
+                raise QueryError(f"Unknown search field '{field}'. Use one of: {', '.join(QUERY_FIELDS)}.")
+            family, prefixes = QUERY_FIELDS[field.lower()]
+            symbol = value.upper()
+            matches = set(self.users(family, symbol))
+            for prefix in prefixes:
+                if not symbol.startswith(prefix):
+                    matches |= self.users(family, prefix + symbol)
+            return matches
+
+        level = LEVEL_TERM_RE.match(term.lower())
+        if level is not None:
+            min_level, max_level = LEVEL_RANGES[level.group(1)](int(level.group(2)))
+            columns = self.party_columns()
+            trainers = columns.trainers_of(columns.select(min_level=min_level, max_level=max_level))
+            return set(trainers.tolist() if hasattr(trainers, 'tolist') else trainers)
+
+        trainers = self.project_data.trainers
+        if term.lower() in ('double', 'single'):
+            double = term.lower() == 'double'
+            return {trainer_index for trainer_index, trainer in enumerate(trainers) if trainer.double_battle == double}
+
+        return self.text_index.search(term)
@@ -0,0 +1,234 @@
+#! /usr/bin/env python3
+
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class ListWindow:
+    ''' The state of a virtualized list: a model of keys, the first row in view, how many rows fit and the
+    selected key. No Tk here, so it can be driven and checked without a display.
+
+    The selection is a key, not a row: it survives replacing the model, and comes back when a filter that hid
+    it is removed.
+    '''
+
+    def __init__(self):
+        self.keys = []
+        self.rows = {}       # Key -> row in keys
+        self.top = 0         # First row in view
+        self.visible = 1     # Rows that fit in the widget
+        self.selection = None
+
+    def set_model(self, keys):
+        ''' Replace every row at once, e.g. with the result of a filter or a sort. The selection stays in view. '''
+        self.keys = list(keys)
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.scroll_to(self.top)
+        self.see(self.selection)
+
+    def set_visible(self, visible):
+        self.visible = max(1, visible)
+        self.scroll_to(self.top)
+
+    def scroll_to(self, top):
+        self.top = max(0, min(top, len(self.keys) - self.visible))
+
+    def scroll_fraction(self, fraction):
+        self.scroll_to(round(fraction * len(self.keys)))
+
+    def window(self):
+        ''' The keys of the rows in view. '''
+        return self.keys[self.top:self.top + self.visible]
+
+    def fractions(self):
+        ''' The (first, last) fractions of the model in view, as a scrollbar wants them. '''
+        if not self.keys:
+            return 0.0, 1.0
+        return self.top / len(self.keys), min(1.0, (self.top + self.visible) / len(self.keys))
+
+    def selected(self):
+        ''' The selected key if it is in the model, else None. '''
+        return self.selection if self.selection in self.rows else None
+
+    def selected_row(self):
+        ''' Row of the selection inside the window, None if it is scrolled out or filtered out. '''
+        row = self.rows.get(self.selection)
+        if row is None or not self.top <= row < self.top + self.visible:
+            return None
+        return row - self.top
+
+    def select(self, key):
+        self.selection = key
+        self.see(key)
+
+    def select_offset(self, offset):
+        ''' Move the selection by `offset` rows, clamped to the model. Returns the new key, None if empty. '''
+        if not self.keys:
+            return None
+        row = self.rows.get(self.selection)
+        if row is None:
+            row = self.top if offset > 0 else self.top + self.visible - 1
+        else:
+            row += offset
+        self.select(self.keys[max(0, min(row, len(self.keys) - 1))])
+        return self.selection
+
+    def neighbours(self, key, count):
+        ''' Keys of up to `count` rows on each side of `key`, nearest first. '''
+        row = self.rows.get(key)
+        if row is None:
+            return []
+        keys = []
+        for distance in range(1, count + 1):
+            if row + distance < len(self.keys):
+                keys.append(self.keys[row + distance])
+            if row - distance >= 0:
+                keys.append(self.keys[row - distance])
+        return keys
+
+    def see(self, key):
+        ''' Scroll the least needed for the row of `key` to be in view. '''
+        row = self.rows.get(key)
+        if row is None:
+            return
+        if row < self.top:
+            self.scroll_to(row)
+        elif row >= self.top + self.visible:
+            self.scroll_to(row - self.visible + 1)
+
+
+class VirtualList(tk.Frame):
+    ''' A listbox with scrollbars for models of any size. The Tk listbox only ever holds the rows in view,
+    which are rendered from the model with `label(key)` whenever it scrolls, so filling or filtering it costs
+    a couple of Tcl calls instead of one per row.
+
+    Picking a row with the mouse or the keyboard generates <<VirtualListSelect>>; selected() returns the key.
+    '''
+
+    def __init__(self, master, label, **listbox_kwargs):
+        super().__init__(master)
+        self.label = label
+        self.state = ListWindow()
+
+        # Listbox and horizontal scrollbar stacked, vertical scrollbar to their right.
+        listbox_frame = tk.Frame(self)
+        listbox_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # exportselection: selecting text in another widget must not clear the row selection.
+        self.listbox = tk.Listbox(listbox_frame, selectmode=tk.SINGLE, exportselection=False, **listbox_kwargs)
+        scrollbar_x = tk.Scrollbar(listbox_frame, orient=tk.HORIZONTAL, command=self.listbox.xview)
+        self.listbox.config(xscrollcommand=scrollbar_x.set)
+        self.listbox.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        scrollbar_x.pack(side=tk.TOP, fill=tk.X)
+        self.scrollbar_y = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind("<<ListboxSelect>>", self.on_listbox_select)
+        self.listbox.bind("<Configure>", self.on_configure)
+        self.listbox.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_units(-3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_units(3))
+        for key, offset in (("<Up>", -1), ("<Down>", 1), ("<Prior>", None), ("<Next>", None)):
+            self.listbox.bind(key, lambda event, offset=offset, key=key: self.on_key(offset, key))
+        self.listbox.bind("<Home>", lambda event: self.on_key(-len(self.state.keys), "<Home>"))
+        self.listbox.bind("<End>", lambda event: self.on_key(len(self.state.keys), "<End>"))
+
+
+    def set_model(self, keys):
+        ''' Replace every row, keeping the selected key selected if it is still there. '''
+        self.state.set_model(keys)
+        self.render()
+
+
+    def size(self):
+        return len(self.state.keys)
+
+
+    def key_at(self, row):
+        return self.state.keys[row]
+
+
+    def selected(self):
+        return self.state.selected()
+
+
+    def neighbours(self, key, count):
+        return self.state.neighbours(key, count)
+
+
+    def select(self, key, notify=False):
+        ''' Select a key and scroll it into view; with notify, also generate <<VirtualListSelect>>. '''
+        self.state.select(key)
+        self.render()
+        if notify:
+            self.event_generate("<<VirtualListSelect>>")
+
+
+    def refresh(self):
+        ''' Render the rows in view again, after the labels of their keys changed. '''
+        self.render()
+
+
+    def render(self):
+        state = self.state
+        self.listbox.delete(0, tk.END)
+        window = state.window()
+        if window:
+            self.listbox.insert(0, *(self.label(key) for key in window))
+        row = state.selected_row()
+        if row is not None:
+            self.listbox.select_set(row)
+            self.listbox.activate(row)
+        self.scrollbar_y.set(*state.fractions())
+
+
+    def yview(self, *args):
+        ''' Vertical scrollbar command: ("moveto", fraction) or ("scroll", count, "units" or "pages"). '''
+        if args[0] == "moveto":
+            self.state.scroll_fraction(float(args[1]))
+            self.render()
+        elif args[0] == "scroll":
+            count = int(args[1])
+            self.scroll_units(count * self.state.visible if args[2] == "pages" else count)
+
+
+    def scroll_units(self, count):
+        self.state.scroll_to(self.state.top + count)
+        self.render()
+        return "break"
+
+
+    def on_mouse_wheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small values of either sign.
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_units(-3 * steps)
+
+
+    def on_configure(self, event):
+        ''' Fit as many rows as the listbox height allows, the way Tk lays them out. '''
+        font = tkfont.Font(font=self.listbox.cget("font"))
+        row_height = font.metrics("linespace") + 1 + 2 * int(self.listbox.cget("selectborderwidth"))
+        border = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        visible = max(1, (event.height - border) // row_height)
+        if visible != self.state.visible:
+            self.state.set_visible(visible)
+            self.render()
+
+
+    def on_listbox_select(self, event):
+        rows = self.listbox.curselection()
+        if not rows:
+            return
+        window = self.state.window()
+        if rows[0] < len(window):
+            self.state.selection = window[rows[0]]
+            self.event_generate("<<VirtualListSelect>>")
+
+
+    def on_key(self, offset, key):
+        ''' Keyboard navigation over the whole model, not just the rows the listbox holds. '''
+        if offset is None:
+            offset = self.state.visible if key == "<Next>" else -self.state.visible
+        if self.state.select_offset(offset) is not None:
+            self.render()
+            self.event_generate("<<VirtualListSelect>>")
+        return "break"
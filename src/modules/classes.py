@@ -1,6 +1,40 @@
 #! /usr/bin/env python3
 
+from sys import intern
+
+# Shared defaults. Symbol strings are interned so every trainer using ITEM_NONE points to the same object.
+DEFAULT_ITEMS = ('ITEM_NONE',) * 4
+DEFAULT_MOVES = ('MOVE_NONE',) * 4
+
+# Order of the values stored in Pokemon.ivs/evs.
+STATS = ("HP", "ATK", "DEF", "SPD", "SPATK", "SPDEF")
+ZERO_STATS = (0,) * len(STATS)
+
+
+def symbol_tuple(symbols):
+    return tuple(intern(symbol) for symbol in symbols)
+
+
+def stats_to_tuple(stats):
+    ''' Pack an {"HP": 31, ...} dict into a STATS-ordered tuple, None for missing stats. Empty or None gives None. '''
+    if not stats:
+        return None
+    return tuple(stats.get(stat) for stat in STATS)
+
+
+def tuple_to_stats(values):
+    if values is None:
+        return {}
+    return {stat: value for stat, value in zip(STATS, values) if value is not None}
+
+
 class Trainer:
+    ''' One gTrainers entry. Slotted since projects hold thousands of them; items is always a 4-tuple. '''
+
+    __slots__ = ('id', 'name', 'trainer_class', 'trainer_pic', 'encounter_music', 'gender', 'double_battle',
+                 '_items', 'ai_flag_mask', 'ai_flag_tokens', '_pokemon', 'party_ref', 'party_name', 'maps', '_extra',
+                 'span', 'dirty')
+
     def __init__(self, id):
         self.id = id
 
@@ -10,38 +44,168 @@ class Trainer:
         self.encounter_music = "TRAINER_ENCOUNTER_MUSIC_MALE"
         self.gender = "MALE"
         self.double_battle = False
-        self.items = []
-        self.ai_flags = []
-        self.pokemon = []
+        self._items = DEFAULT_ITEMS
+        self.ai_flag_mask = 0 # Bits of the project's AiFlagList
+        self.ai_flag_tokens = () # AI flags as written in the source, until AiFlagList.resolve turns them into the mask
+        self._pokemon = []
+        self.party_ref = None # Where to parse the party from while it isn't loaded
         self.party_name = ""
-        self.maps = []
+        self.maps = ()
+        self._extra = None # trainers.party fields the editor doesn't handle, written back as they were
+        self.span = None # (start, end) byte offsets of the entry in trainers.h or of the block in trainers.party
+        self.dirty = False # Edited since loaded; only dirty trainers are rewritten by a splice save
+
+    @property
+    def items(self):
+        return self._items
+
+    @items.setter
+    def items(self, items):
+        self._items = symbol_tuple(items)
+
+    @property
+    def extra(self):
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+    @extra.setter
+    def extra(self, extra):
+        self._extra = extra
+
+    @property
+    def pokemon(self):
+        if self._pokemon is None:
+            self._pokemon = self.party_ref.load() if self.party_ref is not None else []
+        return self._pokemon
+
+    @pokemon.setter
+    def pokemon(self, party):
+        self._pokemon = party
+
+    def set_party_ref(self, party_ref):
+        ''' Defer the party to be parsed from party_ref the first time it is accessed. '''
+        self.party_ref = party_ref
+        self._pokemon = None
+
+    def is_party_loaded(self):
+        return self._pokemon is not None
 
 
 class Pokemon:
+    ''' One party member. moves is always a 4-tuple; ivs/evs are stored as STATS-ordered tuples and read
+    back as new dicts, so assign a whole dict to change them. '''
+
+    __slots__ = ('species', 'level', 'held_item', '_moves', 'iv', '_ivs', '_evs', 'nature', 'ability', 'tera_type', '_extra')
+
     def __init__(self, species):
         self.species = species
 
         self.level = 5
         self.held_item = "ITEM_NONE"
-        self.moves = ["MOVE_NONE", "MOVE_NONE", "MOVE_NONE", "MOVE_NONE"]
+        self._moves = DEFAULT_MOVES
         self.iv = 0
-        self.ivs = {"HP": 0, "ATK": 0, "DEF": 0, "SPD": 0, "SPATK": 0, "SPDEF": 0}
-        self.evs = {"HP": 0, "ATK": 0, "DEF": 0, "SPD": 0, "SPATK": 0, "SPDEF": 0}
+        self._ivs = ZERO_STATS
+        self._evs = ZERO_STATS
         self.nature = "NATURE_HARDY"
         self.ability = "ABILITY_NONE"
+        self.tera_type = None
+        self._extra = None # trainers.party fields the editor doesn't handle, written back as they were
+
+    @property
+    def moves(self):
+        return self._moves
+
+    @moves.setter
+    def moves(self, moves):
+        self._moves = symbol_tuple(moves)
+
+    @property
+    def ivs(self):
+        return tuple_to_stats(self._ivs)
+
+    @ivs.setter
+    def ivs(self, stats):
+        self._ivs = stats_to_tuple(stats)
+
+    @property
+    def evs(self):
+        return tuple_to_stats(self._evs)
+
+    @evs.setter
+    def evs(self, stats):
+        self._evs = stats_to_tuple(stats)
+
+    @property
+    def extra(self):
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+    @extra.setter
+    def extra(self, extra):
+        self._extra = extra
 
 class AiFlagList:
+    ''' AI flags of the project, each given a bit in header order. Trainers store their flags as one mask of these bits. '''
+
     def __init__(self):
         self.flags = []
-    
+        self.bits = {}
+
     def add_flag(self, flag):
-        self.flags.append(flag)
-    
+        if flag not in self.bits:
+            self.bits[flag] = len(self.flags)
+            self.flags.append(flag)
+
     def clear_flags(self):
         self.flags = []
-    
+        self.bits = {}
+
     def is_flag(self, checkflag):
-        for flag in self.flags:
-            if checkflag == flag:
-                return True
-        return False
\ No newline at end of file
+        return checkflag in self.bits
+
+    def flag_mask(self, flag):
+        ''' Return the mask bit of a flag, 0 for unknown flags. '''
+        bit = self.bits.get(flag)
+        return 0 if bit is None else 1 << bit
+
+    def mask_of(self, flags):
+        ''' Combine flag names into a mask. Names that aren't project flags are dropped. '''
+        mask = 0
+        for flag in flags:
+            bit = self.bits.get(flag)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def names_of(self, mask):
+        ''' Return the flag names set in a mask, in header order. '''
+        names = []
+        bit = 0
+        while mask:
+            if mask & 1:
+                names.append(self.flags[bit])
+            mask >>= 1
+            bit += 1
+        return names
+
+    def resolve(self, trainer):
+        ''' Turn the AI flag tokens read by the parsers into the trainer's mask. '''
+        trainer.ai_flag_mask = self.mask_of(trainer.ai_flag_tokens)
+        trainer.ai_flag_tokens = ()
+
+
+class ProjectData():
+    def __init__(self):
+        self.trainers = []
+        self.expansion = False
+        self.showdown = False # Trainers come from trainers.party instead of trainers.h/trainer_parties.h
+        self.ai_flags = AiFlagList()
+        self.constants = None
+        self.symbols = None # SymbolTable of the constants, for ID-based queries
+        self.party_columns = None # PartyColumns, built by the first project-wide party query
+        self.usages = None # UsageIndex from symbols to the trainers using them
+        self.source_paths = {} # Project file key -> path the trainers were parsed from, for splice saves
+        self.trainer_pics = None
+        self.mon_pics = None
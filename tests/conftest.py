@@ -0,0 +1,210 @@
+import os
+import sys
+
+import pytest
+
+# The editor imports its modules as `modules.X` from src/, the way main.py and cli.py are run.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+CONSTANTS_FILES = {
+    "include/constants/battle_ai.h":
+        "#define AI_SCRIPT_CHECK_BAD_MOVE (1 << 0)\n"
+        "#define AI_SCRIPT_TRY_TO_FAINT (1 << 1)\n"
+        "#define AI_FLAG_CHECK_BAD_MOVE (1 << 0)\n"
+        "#define AI_FLAG_TRY_TO_FAINT (1 << 1)\n",
+    "include/constants/items.h":
+        "#define ITEM_NONE 0\n#define ITEM_POTION 1\n#define ITEM_FULL_RESTORE 2\n#define ITEM_KINGS_ROCK 3\n",
+    "include/constants/moves.h":
+        "#define MOVE_NONE 0\n#define MOVE_TACKLE 1\n#define MOVE_POUND 2\n#define MOVE_U_TURN 3\n#define MOVE_WILL_O_WISP 4\n",
+    "include/constants/opponents.h":
+        "#define TRAINER_NONE 0\n#define TRAINER_ROSE 1\n#define TRAINER_DAISY 2\n#define TRAINER_IRIS 3\n",
+    "include/constants/pokemon.h":
+        "#define NATURE_HARDY 0\n#define NATURE_ADAMANT 1\n",
+    "include/constants/species.h":
+        "#define SPECIES_NONE 0\n#define SPECIES_GEODUDE 1\n#define SPECIES_MR_MIME 2\n#define SPECIES_HO_OH 3\n",
+    "include/constants/trainers.h":
+        "#define TRAINER_PIC_HIKER 0\n#define TRAINER_PIC_LASS 1\n"
+        "#define TRAINER_CLASS_PKMN_TRAINER_1 0\n#define TRAINER_CLASS_HIKER 1\n"
+        "#define TRAINER_ENCOUNTER_MUSIC_MALE 0\n#define TRAINER_ENCOUNTER_MUSIC_FEMALE 1\n",
+    "src/data/trainer_graphics/front_pic_tables.h":
+        "const struct CompressedSpriteSheet gTrainerFrontPicTable[] =\n{\n"
+        "    TRAINER_SPRITE(HIKER, gTrainerFrontPic_Hiker, 0x800),\n"
+        "    TRAINER_SPRITE(LASS, gTrainerFrontPic_Lass, 0x800),\n};\n",
+    "src/data/graphics/trainers.h":
+        'const u32 gTrainerFrontPic_Hiker[] = INCBIN_U32("graphics/trainers/front_pics/hiker_front_pic.4bpp.lz");\n'
+        'const u32 gTrainerFrontPic_Lass[] = INCBIN_U32("graphics/trainers/front_pics/lass_front_pic.4bpp.lz");\n',
+    "src/data/pokemon_graphics/front_pic_table.h":
+        "const struct CompressedSpriteSheet gMonFrontPicTable[] =\n{\n"
+        "    SPECIES_SPRITE(GEODUDE, gMonFrontPic_Geodude),\n};\n",
+    "src/anim_mon_front_pics.c":
+        'const u32 gMonFrontPic_Geodude[] = INCBIN_U32("graphics/pokemon/geodude/anim_front.4bpp.lz");\n',
+}
+
+TRAINERS_H = """\
+const struct Trainer gTrainers[] = {
+    [TRAINER_NONE] =
+    {
+        .partyFlags = 0,
+        .trainerClass = TRAINER_CLASS_PKMN_TRAINER_1,
+        .encounterMusic_gender = TRAINER_ENCOUNTER_MUSIC_MALE,
+        .trainerPic = TRAINER_PIC_HIKER,
+        .trainerName = _(""),
+        .items = {},
+        .doubleBattle = FALSE,
+        .aiFlags = 0,
+        .partySize = 0,
+        .party = {.NoItemDefaultMoves = NULL},
+    },
+
+    // Route 101
+    [TRAINER_ROSE] =
+    {
+        .trainerClass = TRAINER_CLASS_HIKER,
+        .encounterMusic_gender = TRAINER_ENCOUNTER_MUSIC_MALE,
+        .trainerPic = TRAINER_PIC_HIKER,
+        .trainerName = _("ROSE"),
+        .items = {},
+        .doubleBattle = FALSE,
+        .aiFlags = AI_SCRIPT_CHECK_BAD_MOVE,
+        .party = NO_ITEM_CUSTOM_MOVES(sParty_Rose),
+    },
+
+#if FREE_EXTRA_TRAINERS == FALSE
+    [TRAINER_DAISY] =
+    {
+        .trainerClass = TRAINER_CLASS_HIKER,
+        .encounterMusic_gender = F_TRAINER_FEMALE | TRAINER_ENCOUNTER_MUSIC_FEMALE,
+        .trainerPic = TRAINER_PIC_LASS,
+        .trainerName = _("DAISY"),
+        .items = {ITEM_POTION, ITEM_NONE, ITEM_NONE, ITEM_NONE},
+        .doubleBattle = TRUE,
+        .aiFlags = AI_SCRIPT_CHECK_BAD_MOVE | AI_SCRIPT_TRY_TO_FAINT,
+        .party = ITEM_DEFAULT_MOVES(sParty_Daisy),
+    },
+#endif //FREE_EXTRA_TRAINERS
+
+    [TRAINER_IRIS] =
+    {
+        .trainerClass = TRAINER_CLASS_HIKER,
+        .encounterMusic_gender = TRAINER_ENCOUNTER_MUSIC_MALE,
+        .trainerPic = TRAINER_PIC_HIKER,
+        .trainerName = _("IRIS"),
+        .items = {},
+        .doubleBattle = FALSE,
+        .aiFlags = 0,
+        .party = NO_ITEM_DEFAULT_MOVES(sParty_Iris),
+    },
+};
+"""
+
+TRAINER_PARTIES_H = """\
+// Parties of the test trainers
+static const struct TrainerMonNoItemCustomMoves sParty_Rose[] = {
+    {
+    .iv = 0,
+    .lvl = 5,
+    .species = SPECIES_GEODUDE,
+    .moves = {MOVE_TACKLE, MOVE_POUND, MOVE_NONE, MOVE_NONE}
+    }
+};
+
+#if FREE_EXTRA_TRAINERS == FALSE
+static const struct TrainerMonItemDefaultMoves sParty_Daisy[] = {
+    {
+    .iv = 10,
+    .lvl = 12,
+    .species = SPECIES_MR_MIME,
+    .heldItem = ITEM_KINGS_ROCK
+    },
+    {
+    .iv = 10,
+    .lvl = 13,
+    .species = SPECIES_GEODUDE,
+    .heldItem = ITEM_POTION
+    }
+};
+#endif //FREE_EXTRA_TRAINERS
+
+static const struct TrainerMonNoItemDefaultMoves sParty_Iris[] = {
+    {
+    .iv = 0,
+    .lvl = 20,
+    .species = SPECIES_HO_OH,
+    }
+};
+"""
+
+TRAINERS_PARTY = """\
+/*
+Trainer data, compiled by trainerproc.
+*/
+
+=== TRAINER_NONE ===
+Name:
+Class: Pkmn Trainer 1
+Pic: Hiker
+Gender: Male
+Music: Male
+Double Battle: No
+
+=== TRAINER_ROSE ===
+Name: Rose
+Class: Hiker
+Pic: Hiker
+Gender: Male
+Music: Male
+Items: Full Restore
+Double Battle: No
+AI: Check Bad Move / Try To Faint
+
+Rocky (Mr. Mime) (F) @ King's Rock
+Level: 25
+IVs: 31 HP / 31 Atk
+EVs: 252 Atk / 4 HP / 252 Spe
+Ability: Filter
+Nature: Adamant
+/* Keeps its moves for the rematch */
+- U-turn
+- Will-O-Wisp
+
+/* Extra trainers */
+
+=== TRAINER_DAISY ===
+Name: Daisy
+Class: Hiker
+Pic: Lass
+Gender: Female
+Music: Female
+Double Battle: Yes
+
+Ho-Oh
+Level: 50
+- Tackle
+"""
+
+
+def write_project(root, project_type):
+    ''' Write a small decomp project of `project_type` under `root` and return the path of its trainer files. '''
+    files = dict(CONSTANTS_FILES)
+    files["src/data/trainers.h"] = TRAINERS_H
+    files["src/data/trainer_parties.h"] = TRAINER_PARTIES_H
+    if project_type == "pokeemerald-expansion":
+        files["src/data/trainers.party"] = TRAINERS_PARTY
+    for name, content in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", newline="\n") as f:
+            f.write(content)
+    return os.path.join(root, "src", "data")
+
+
+@pytest.fixture
+def emerald_project(tmp_path):
+    write_project(str(tmp_path), "pokeemerald")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def expansion_project(tmp_path):
+    write_project(str(tmp_path), "pokeemerald-expansion")
+    return str(tmp_path)
@@ -0,0 +1,44 @@
+import tkinter as tk
+
+from modules.AutocompleteCombobox import SymbolChoices
+
+SPECIES = SymbolChoices('species', ['SPECIES_%s' % name for name in
+                                    ('BULBASAUR', 'IVYSAUR', 'PIKACHU', 'RAICHU', 'PICHU', 'MR_MIME', 'MIME_JR',
+                                     'PIKACHU_COSPLAY', 'SLOWPOKE', 'SLOWBRO')])
+
+MOVES = SymbolChoices('moves', ['MOVE_NONE'] + ['MOVE_%s_%d' % (word, i) for i in range(150)
+                                                for word in ('PUNCH', 'KICK', 'BEAM', 'SLASH', 'WAVE', 'BITE')])
+
+
+def suggest(choices, text):
+    return choices.rank(text, choices.matches(text))
+
+
+def test_common_prefix_is_ignored():
+    assert SPECIES.prefix == 'SPECIES_'
+    assert suggest(SPECIES, 'species_slow') == ['SPECIES_SLOWPOKE', 'SPECIES_SLOWBRO']
+    assert suggest(SPECIES, 'SPECIES_SLOW') == ['SPECIES_SLOWPOKE', 'SPECIES_SLOWBRO']
+
+
+def test_prefix_matches_rank_before_word_and_substring_matches():
+    assert suggest(SPECIES, 'pi') == ['SPECIES_PIKACHU', 'SPECIES_PICHU', 'SPECIES_PIKACHU_COSPLAY']
+    assert suggest(SPECIES, 'mime') == ['SPECIES_MIME_JR', 'SPECIES_MR_MIME']
+    assert suggest(SPECIES, 'saur') == ['SPECIES_BULBASAUR', 'SPECIES_IVYSAUR']
+
+
+def test_typing_narrows_the_previous_matches():
+    assert SPECIES.matches('chu', SPECIES.matches('c')) == SPECIES.matches('chu')
+    candidates = None
+    for length in range(1, len('beam_1') + 1):
+        candidates = MOVES.matches('beam_1'[:length], candidates)
+    assert MOVES.rank('beam_1', candidates)[:2] == ['MOVE_BEAM_1', 'MOVE_BEAM_10']
+
+
+def test_list_is_sent_to_each_interpreter_once():
+    tcl = tk.Tcl()
+    widget = type('Widget', (), {'tk': tcl})
+    variable = MOVES.tcl_variable(widget)
+    tcl.eval('set values $%s' % variable)
+    assert tcl.eval('llength $values') == str(len(MOVES.symbols))
+    tcl.call('set', variable, ())
+    assert MOVES.tcl_variable(widget) == variable and tcl.eval('llength $%s' % variable) == '0'
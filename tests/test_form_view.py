@@ -0,0 +1,65 @@
+from modules.FormView import FormView, RefreshScheduler
+
+
+class Variable:
+    ''' Records the writes a Tk widget or variable would get. '''
+    def __init__(self, value=""):
+        self.value = value
+        self.writes = 0
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.writes += 1
+        self.value = value
+
+
+class IdleLoop:
+    def __init__(self):
+        self.idle = []
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+    def run(self):
+        while self.idle:
+            self.idle.pop(0)()
+
+
+def make_form(names):
+    form = FormView()
+    variables = {name: Variable() for name in names}
+    for name, variable in variables.items():
+        form.add_variable(name, variable)
+    return form, variables
+
+
+def test_show_writes_only_the_fields_that_differ():
+    form, variables = make_form(['id', 'name', 'class'])
+    assert form.show({'id': 'TRAINER_1', 'name': 'ROSE', 'class': 'HIKER'}) == ['id', 'name', 'class']
+    assert form.show({'id': 'TRAINER_2', 'name': 'DAISY', 'class': 'HIKER'}) == ['id', 'name']
+    assert variables['class'].writes == 1
+
+
+def test_show_overwrites_unsaved_edits():
+    form, variables = make_form(['name'])
+    form.show({'name': 'ROSE'})
+    variables['name'].value = 'ROSE (edited)' # Typed by the user, not saved
+    assert form.show({'name': 'ROSE'}) == ['name']
+    assert variables['name'].value == 'ROSE'
+
+
+def test_scheduler_coalesces_a_burst_into_one_refresh():
+    loop = IdleLoop()
+    selected = []
+    refreshes = []
+    scheduler = RefreshScheduler(loop, lambda: refreshes.append(selected[-1]))
+    for step in range(50): # A held arrow key: 5 selection events per idle point
+        selected.append(step)
+        scheduler.request()
+        if step % 5 == 4:
+            loop.run()
+    assert refreshes == [4, 9, 14, 19, 24, 29, 34, 39, 44, 49]
+    count, average, worst = scheduler.latency_stats()
+    assert count == 10 and 0 <= average <= worst
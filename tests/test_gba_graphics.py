@@ -0,0 +1,58 @@
+import os
+import struct
+
+from modules import GbaGraphics
+from modules.GbaGraphics import ThumbnailCache, decode_4bpp, load_sprite, lz77_decompress
+
+
+def literal_lz77(data):
+    ''' An LZ77 stream storing `data` as literals only: a flag byte of 0 before every 8 bytes. '''
+    out = bytearray(struct.pack("<I", 0x10 | len(data) << 8))
+    for start in range(0, len(data), 8):
+        out.append(0)
+        out += data[start:start + 8]
+    return bytes(out)
+
+
+def synthetic_sprite():
+    ''' A 64x128 two frame sprite as 4bpp tiles, and its pixels row by row. '''
+    pixels = [0] * (64 * 128)
+    for y in range(16, 112):
+        for x in range(16, 48):
+            pixels[y * 64 + x] = (x // 4 + y // 8) % 15 + 1
+    tiles = bytearray()
+    for tile_y in range(16):
+        for tile_x in range(8):
+            for y in range(8):
+                row = (tile_y * 8 + y) * 64 + tile_x * 8
+                tiles += bytes(pixels[row + x] | pixels[row + x + 1] << 4 for x in range(0, 8, 2))
+    return bytes(tiles), pixels
+
+
+def test_lz77_literals_and_back_references():
+    data = bytes(range(256)) * 3
+    assert lz77_decompress(literal_lz77(data)) == data
+    # "ab" as literals, then 6 bytes copied from 2 back, overlapping what they write.
+    assert lz77_decompress(bytes([0x10, 8, 0, 0, 0x20, ord('a'), ord('b'), 0x30, 0x01])) == b'abababab'
+
+
+def test_decode_4bpp_lays_tiles_out_row_by_row():
+    tiles, pixels = synthetic_sprite()
+    width, height, indexes = decode_4bpp(tiles)
+    flat = indexes.reshape(-1).tolist() if GbaGraphics.numpy is not None else indexes
+    assert (width, height) == (64, 128) and flat == pixels
+
+
+def test_load_sprite_converts_and_caches_a_missing_png(tmp_path):
+    tiles, pixels = synthetic_sprite()
+    species_dir = tmp_path / "graphics" / "pokemon" / "geodude"
+    species_dir.mkdir(parents=True)
+    (species_dir / "anim_front.4bpp.lz").write_bytes(literal_lz77(tiles))
+    (species_dir / "normal.pal").write_text(
+        "JASC-PAL\n0100\n16\n" + "".join("%d %d %d\n" % (i * 16, 255 - i * 16, 128) for i in range(16)))
+    thumbnails = ThumbnailCache(str(tmp_path / "thumbnails"))
+
+    png_path = str(species_dir / "anim_front.png")
+    data = load_sprite(png_path, thumbnails)
+    assert data.startswith(b'\x89PNG') and len(os.listdir(thumbnails.directory)) == 1
+    assert load_sprite(png_path, thumbnails) == data
@@ -0,0 +1,33 @@
+import os
+
+from modules.LoadTrainerData import parse_trainers, index_trainer_parties, parse_trainer_parties
+from modules.MmapTrainerData import parse_trainers_mmap, index_trainer_parties_mmap, parse_trainer_parties_mmap
+
+
+def trainer_fields(trainer):
+    return (trainer.id, trainer.name, trainer.trainer_class, trainer.trainer_pic, trainer.encounter_music,
+            trainer.gender, trainer.double_battle, trainer.items, trainer.ai_flag_tokens, trainer.party_name,
+            trainer.span)
+
+
+def mon_fields(mon):
+    return (mon.species, mon.level, mon.iv, mon.held_item, mon.moves)
+
+
+def test_mmap_backend_matches_the_line_parser(emerald_project):
+    data = os.path.join(emerald_project, "src", "data")
+    trainers_path = os.path.join(data, "trainers.h")
+    parties_path = os.path.join(data, "trainer_parties.h")
+
+    assert [trainer_fields(t) for t in parse_trainers_mmap(trainers_path)] == \
+           [trainer_fields(t) for t in parse_trainers(trainers_path)]
+
+    index = index_trainer_parties(parties_path)
+    mmap_index = index_trainer_parties_mmap(parties_path)
+    assert {symbol: (ref.start, ref.end) for symbol, ref in mmap_index.items()} == \
+           {symbol: (ref.start, ref.end) for symbol, ref in index.items()}
+
+    parties = parse_trainer_parties(parties_path)
+    mmap_parties = parse_trainer_parties_mmap(parties_path)
+    assert {symbol: [mon_fields(mon) for mon in party] for symbol, party in mmap_parties.items()} == \
+           {symbol: [mon_fields(mon) for mon in party] for symbol, party in parties.items()}
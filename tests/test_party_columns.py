@@ -0,0 +1,52 @@
+import pytest
+
+from modules import PartyColumns as party_columns
+from modules.LoadTrainerData import load_all_parties
+from modules.ProjectLoader import ProjectLoader
+
+# Each query runs vectorized when NumPy is installed and through the plain loops otherwise.
+BACKENDS = ['numpy', 'loops'] if party_columns.numpy is not None else ['loops']
+
+QUERIES = [
+    ({'min_level': 9, 'has_held_item': True},
+     lambda mon: mon.level >= 9 and mon.held_item != 'ITEM_NONE'),
+    ({'species': 'SPECIES_GEODUDE'}, lambda mon: mon.species == 'SPECIES_GEODUDE'),
+    ({'move': 'MOVE_TACKLE'}, lambda mon: 'MOVE_TACKLE' in mon.moves),
+    ({'held_item': 'ITEM_KINGS_ROCK', 'max_level': 12},
+     lambda mon: mon.held_item == 'ITEM_KINGS_ROCK' and mon.level <= 12),
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def project_data(request, emerald_project, monkeypatch):
+    if request.param == 'loops':
+        monkeypatch.setattr(party_columns, 'numpy', None)
+    project_data = ProjectLoader(emerald_project, "pokeemerald", use_cache=False).load()
+    load_all_parties(project_data.trainers)
+    return project_data
+
+
+def walk(project_data, condition):
+    return [index for index, trainer in enumerate(project_data.trainers) if any(condition(mon) for mon in trainer.pokemon)]
+
+
+@pytest.mark.parametrize('query, condition', QUERIES)
+def test_select_matches_a_walk_over_the_parties(project_data, query, condition):
+    columns = party_columns.PartyColumns(project_data)
+    assert list(columns.trainers_of(columns.select(**query))) == walk(project_data, condition)
+
+
+def test_update_trainer_resyncs_an_edited_party(project_data):
+    columns = party_columns.PartyColumns(project_data)
+    iris = project_data.trainers.index(next(trainer for trainer in project_data.trainers if trainer.id == "TRAINER_IRIS"))
+    project_data.trainers[iris].pokemon[0].species = 'SPECIES_GEODUDE'
+    columns.update_trainer(iris)
+    assert iris in list(columns.trainers_of(columns.select(species='SPECIES_GEODUDE')))
+
+
+def test_unknown_symbols_match_nothing_and_get_no_id(project_data):
+    columns = party_columns.PartyColumns(project_data)
+    species_count = len(project_data.symbols.family('species'))
+    assert list(columns.select(species='SPECIES_MISSINGNO')) == []
+    assert list(columns.select(move='MOVE_SPLASH')) == []
+    assert len(project_data.symbols.family('species')) == species_count
@@ -0,0 +1,171 @@
+import os
+
+from modules.LoadTrainerData import load_all_parties, parse_trainers, parse_trainer_parties, read_showdown_trainers
+from modules.ProjectLoader import ProjectLoader
+from modules.classes import Pokemon
+from modules.SaveTrainerData import TrainerDataFile, save_trainer_files
+
+
+def load(project_path, project_type="pokeemerald"):
+    return ProjectLoader(project_path, project_type, project_type == "pokeemerald-expansion", use_cache=False).load()
+
+
+def project_paths(project_path):
+    data = os.path.join(project_path, "src", "data")
+    return {
+        'trainers_party': os.path.join(data, "trainers.party"),
+        'trainer_data': os.path.join(data, "trainers.h"),
+        'trainer_parties': os.path.join(data, "trainer_parties.h"),
+    }
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def trainer(project_data, trainer_id):
+    return next(trainer for trainer in project_data.trainers if trainer.id == trainer_id)
+
+
+def summary(trainer):
+    party = [(mon.species, mon.level, mon.iv, mon.held_item, mon.moves) for mon in trainer.pokemon]
+    return (trainer.id, trainer.name, trainer.trainer_class, trainer.trainer_pic, trainer.encounter_music,
+            trainer.gender, trainer.double_battle, trainer.items, trainer.party_name, party)
+
+
+def test_regenerated_files_parse_back_the_same(emerald_project, tmp_path):
+    project_data = load(emerald_project)
+    load_all_parties(project_data.trainers)
+    save_obj = TrainerDataFile(project_data.trainers, "pokeemerald", project_data.ai_flags)
+    save_obj.init_file()
+    output = tmp_path / "out"
+    output.mkdir()
+    assert len(save_obj.create_files(str(output))) == 2
+
+    trainers = parse_trainers(str(output / "trainers.h"))
+    parties = parse_trainer_parties(str(output / "trainer_parties.h"))
+    for trainer in trainers:
+        trainer.pokemon = parties.get(trainer.party_name, [])
+        project_data.ai_flags.resolve(trainer)
+    assert [summary(trainer) for trainer in trainers] == [summary(trainer) for trainer in project_data.trainers]
+    assert [trainer.ai_flag_mask for trainer in trainers] == [trainer.ai_flag_mask for trainer in project_data.trainers]
+    assert read(str(output / "trainers.h")).endswith(b"    }\n};\n")
+
+
+def test_unchanged_save_writes_nothing(emerald_project):
+    paths = project_paths(emerald_project)
+    before = {key: (read(path), os.stat(path).st_mtime_ns) for key, path in paths.items() if os.path.exists(path)}
+    project_data = load(emerald_project)
+
+    assert save_trainer_files(project_data, "pokeemerald", paths) == []
+    for key, (content, mtime) in before.items():
+        assert read(paths[key]) == content
+        assert os.stat(paths[key]).st_mtime_ns == mtime
+
+
+def test_edit_rewrites_only_that_trainer(emerald_project):
+    paths = project_paths(emerald_project)
+    trainers_before = read(paths['trainer_data'])
+    parties_before = read(paths['trainer_parties'])
+    project_data = load(emerald_project)
+
+    daisy = trainer(project_data, "TRAINER_DAISY")
+    daisy.name = "DAISY B"
+    daisy.pokemon[0].level = 14
+    daisy.dirty = True
+    assert save_trainer_files(project_data, "pokeemerald", paths) == [paths['trainer_data'], paths['trainer_parties']]
+
+    trainers_after = read(paths['trainer_data'])
+    parties_after = read(paths['trainer_parties'])
+    assert trainers_after == trainers_before.replace(b'_("DAISY")', b'_("DAISY B")')
+    assert parties_after == parties_before.replace(b".lvl = 12,", b".lvl = 14,")
+    assert b"// Route 101" in trainers_after and b"#if FREE_EXTRA_TRAINERS == FALSE" in parties_after
+    assert not daisy.dirty
+
+
+def test_second_save_after_spans_moved(emerald_project):
+    paths = project_paths(emerald_project)
+    project_data = load(emerald_project)
+
+    rose = trainer(project_data, "TRAINER_ROSE")
+    rose.name = "ROSE WITH A MUCH LONGER NAME"
+    rose.pokemon.append(Pokemon("SPECIES_MR_MIME"))
+    rose.dirty = True
+    save_trainer_files(project_data, "pokeemerald", paths)
+
+    # Both entries after Rose's moved; edit one of them and Rose again.
+    iris = trainer(project_data, "TRAINER_IRIS")
+    iris.name = "IRIS B"
+    iris.dirty = True
+    rose.name = "ROSE C"
+    rose.dirty = True
+    save_trainer_files(project_data, "pokeemerald", paths)
+
+    names = {trainer.id: trainer.name for trainer in parse_trainers(paths['trainer_data'])}
+    assert names == {"TRAINER_NONE": "", "TRAINER_ROSE": "ROSE C", "TRAINER_DAISY": "DAISY", "TRAINER_IRIS": "IRIS B"}
+    parties = parse_trainer_parties(paths['trainer_parties'])
+    assert [mon.species for mon in parties["sParty_Rose"]] == ["SPECIES_GEODUDE", "SPECIES_MR_MIME"]
+    assert [mon.species for mon in parties["sParty_Iris"]] == ["SPECIES_HO_OH"]
+    assert b"#endif //FREE_EXTRA_TRAINERS" in read(paths['trainer_data'])
+
+
+def test_moved_entries_fall_back_to_regenerating(emerald_project):
+    paths = project_paths(emerald_project)
+    project_data = load(emerald_project)
+
+    # Edited outside the editor after the load: every span now points at the wrong bytes.
+    content = read(paths['trainer_data'])
+    with open(paths['trainer_data'], "wb") as f:
+        f.write(b"// Edited elsewhere\n" + content)
+
+    rose = trainer(project_data, "TRAINER_ROSE")
+    rose.name = "ROSE B"
+    rose.dirty = True
+    save_trainer_files(project_data, "pokeemerald", paths)
+
+    trainers = parse_trainers(paths['trainer_data'])
+    assert [trainer.id for trainer in trainers] == ["TRAINER_NONE", "TRAINER_ROSE", "TRAINER_DAISY", "TRAINER_IRIS"]
+    assert trainers[1].name == "ROSE B"
+    assert b"// Edited elsewhere" not in read(paths['trainer_data'])
+
+    # The spans were located again, so the next edit splices.
+    content = read(paths['trainer_data'])
+    start, end = rose.span
+    assert b"[TRAINER_ROSE]" in content[start:end]
+    assert not rose.dirty
+
+
+def test_party_file_survives_an_unchanged_save(expansion_project):
+    paths = project_paths(expansion_project)
+    before = read(paths['trainers_party'])
+    project_data = load(expansion_project, "pokeemerald-expansion")
+    load_all_parties(project_data.trainers)
+
+    assert project_data.showdown
+    assert save_trainer_files(project_data, "pokeemerald-expansion", paths) == []
+    assert read(paths['trainers_party']) == before
+
+
+def test_party_file_edit_keeps_names_and_comments(expansion_project):
+    paths = project_paths(expansion_project)
+    before = read(paths['trainers_party']).decode()
+    project_data = load(expansion_project, "pokeemerald-expansion")
+
+    rose = trainer(project_data, "TRAINER_ROSE")
+    rose.pokemon[0].level = 30
+    rose.dirty = True
+    save_trainer_files(project_data, "pokeemerald-expansion", paths)
+
+    after = read(paths['trainers_party']).decode()
+    assert "Rocky (Mr. Mime) (F) @ King's Rock\nLevel: 30\n" in after
+    assert "- U-turn\n- Will-O-Wisp\n" in after
+    assert "/* Keeps its moves for the rematch */" in after
+    assert after.startswith("/*\nTrainer data, compiled by trainerproc.\n*/\n")
+    # Blocks that were not edited are untouched.
+    assert after[after.index("/* Extra trainers */"):] == before[before.index("/* Extra trainers */"):]
+    assert after[:after.index("=== TRAINER_ROSE ===")] == before[:before.index("=== TRAINER_ROSE ===")]
+
+    reloaded = list(read_showdown_trainers(paths['trainers_party']))
+    assert reloaded[1].pokemon[0].level == 30
+    assert reloaded[1].pokemon[0].moves == ("MOVE_U_TURN", "MOVE_WILL_O_WISP", "MOVE_NONE", "MOVE_NONE")
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from modules.SpriteCache import SpriteCache, MISSING_ENTRY_BYTES, PREFETCH_POLL_MS
+
+SPRITE_BYTES = 16384
+
+
+class Loop:
+    ''' Runs after() callbacks on demand, like the Tk main loop would. '''
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def run(self):
+        while self.callbacks:
+            time.sleep(PREFETCH_POLL_MS / 1000)
+            self.callbacks.pop(0)()
+
+
+@pytest.fixture
+def loop():
+    return Loop()
+
+
+@pytest.fixture
+def cache(loop):
+    # A stand-in decoder: the image is the file contents, charged as a 64x64 sprite.
+    cache = SpriteCache(loop, max_bytes=10 * SPRITE_BYTES, decode=lambda master, data: (data, SPRITE_BYTES))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def paths(tmp_path):
+    paths = []
+    for i in range(20):
+        path = tmp_path / ('sprite%d.png' % i)
+        path.write_bytes(b'sprite %d' % i)
+        paths.append(str(path))
+    return paths
+
+
+def test_get_decodes_and_remembers_missing_files(cache, tmp_path):
+    path = tmp_path / 'sprite.png'
+    path.write_bytes(b'sprite')
+    assert cache.get(str(path)) == b'sprite'
+    assert cache.get(str(tmp_path / 'missing.png')) is None
+
+
+def test_prefetch_then_evict_least_recently_used(cache, loop, paths):
+    cache.get(paths[0])
+    cache.prefetch(paths[1:8])
+    loop.run()
+    assert all(path in cache.entries for path in paths[1:8])
+    for path in paths[8:]:
+        cache.get(path)
+    assert len(cache.entries) == 10 and cache.used_bytes == 10 * SPRITE_BYTES and paths[19] in cache.entries
+    assert paths[0] not in cache.entries
+
+
+def test_missing_files_count_against_the_cap(cache, tmp_path):
+    for i in range(1000):
+        cache.get(str(tmp_path / ('missing%d.png' % i)))
+    assert cache.used_bytes <= cache.max_bytes
+    assert len(cache.entries) == cache.max_bytes // MISSING_ENTRY_BYTES
+
+
+def test_clear_drops_queued_reads(cache, loop, paths):
+    cache.prefetch(paths[:10])
+    cache.clear()
+    loop.run()
+    assert not cache.entries and not cache.pending and cache.read.empty()
+    cache.close()
+    assert cache.thread is None
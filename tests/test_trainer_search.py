@@ -0,0 +1,40 @@
+from modules.TrainerSearch import NgramIndex
+
+CLASSES = ['HIKER', 'LASS', 'YOUNGSTER', 'BUG_CATCHER', 'SWIMMER_M', 'AROMA_LADY', 'GENTLEMAN', 'PICNICKER']
+TEXTS = {i: ('TRAINER_%s_%d' % (CLASSES[i % len(CLASSES)], i), '%s %d' % (CLASSES[i % len(CLASSES)].title(), i))
+         for i in range(500)}
+
+
+def scan(texts, word):
+    word = word.lower()
+    return {key for key, (trainer_id, name) in texts.items() if word in trainer_id.lower() or word in name.lower()}
+
+
+def build():
+    index = NgramIndex()
+    for key, texts in TEXTS.items():
+        index.add(key, *texts)
+    return index
+
+
+def test_search_matches_a_scan():
+    index = build()
+    for word in ['h', 'hi', 'hik', 'HIKER_1', 'lass_19', 'swimmer_m_12', 'Lady 3', 'nothing']:
+        assert index.search(word) == scan(TEXTS, word)
+
+
+def test_no_match_spans_two_texts():
+    index = NgramIndex()
+    index.add(0, 'TRAINER_ROSE', 'Rose')
+    assert index.search('roserose') == set()
+
+
+def test_add_replaces_and_remove_forgets():
+    index = build()
+    index.add(8, 'TRAINER_CAMPER_8', 'Camper 8')
+    index.remove(9)
+    texts = dict(TEXTS)
+    texts[8] = ('TRAINER_CAMPER_8', 'Camper 8')
+    del texts[9]
+    for word in ['hiker_8', 'camper', 'lass_9', 'ass', '9']:
+        assert index.search(word) == scan(texts, word)
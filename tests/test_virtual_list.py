@@ -0,0 +1,39 @@
+from modules.VirtualList import ListWindow
+
+
+def window_of(keys, visible=10):
+    state = ListWindow()
+    state.set_visible(visible)
+    state.set_model(keys)
+    return state
+
+
+def test_selecting_scrolls_the_row_into_view():
+    state = window_of(range(1000))
+    state.select(500)
+    assert state.top == 491 and state.selected_row() == 9
+
+
+def test_selection_follows_the_key_through_model_changes():
+    state = window_of(range(1000))
+    state.select(500)
+    state.set_model(key for key in range(1000) if key % 2 == 0) # Filter
+    assert state.selected() == 500 and state.window()[state.selected_row()] == 500
+    state.set_model(key for key in range(1000) if key % 2 == 1) # Filtered out, but remembered
+    assert state.selected() is None and state.selected_row() is None
+    state.set_model(reversed(range(1000))) # Sorting is a model replacement too
+    assert state.selected() == 500
+
+
+def test_scrolling_and_keyboard_moves_stay_in_bounds():
+    state = window_of(reversed(range(1000)))
+    state.select(500)
+    state.scroll_fraction(1.0)
+    assert state.window() == list(range(9, -1, -1)) and state.fractions() == (0.99, 1.0)
+    state.select_offset(-1000)
+    assert state.selected() == 999 and state.top == 0
+
+
+def test_neighbours_alternate_around_the_key():
+    state = window_of(reversed(range(1000)))
+    assert state.neighbours(998, 2) == [997, 999, 996]